@@ -1,33 +1,68 @@
 import pandas as pd
+import numpy as np
 import joblib
 import os
+try:
+    from ML.model_registry import REGISTRY
+except ImportError:  # run as a script from src/ML
+    from model_registry import REGISTRY
+
+MODEL_FILE = "logistic_model.pkl"
+ENCODER_FILE = "label_encoder.pkl"
+COLUMNS_FILE = "diseases_symptoms_sample_trim.csv"
+
 def get_local_path(filename):
     return os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
-def predict(input_symptoms: []):
-    # Load the model
-    lr = joblib.load(get_local_path("logistic_model.pkl"))
-    le = joblib.load(get_local_path("label_encoder.pkl"))
 
-    # Load the original dataset just to get column names
-    df = pd.read_csv(get_local_path("diseases_symptoms_sample_trim.csv"))
+def _load_symptom_columns(path):
+    # Only the header is needed to get column names
+    df = pd.read_csv(path, nrows=0)
     df.columns = df.columns.str.replace(' ', '_')
 
     # Drop disease column
-    symptom_columns = df.columns.drop('diseases')
+    symptom_columns = list(df.columns.drop('diseases'))
+    col_index = {col: i for i, col in enumerate(symptom_columns)}
+    return symptom_columns, col_index
 
-    # Example input symptoms
-    #input_symptoms = ['depression', 'shortness_of_breath']
+def load_artifacts():
+    """
+    Return (model, label_encoder, symptom_columns, col_index) from the process-wide registry.
+    Files are read once and reloaded only when their mtime changes.
+    """
+    lr = REGISTRY.get(get_local_path(MODEL_FILE), joblib.load)
+    le = REGISTRY.get(get_local_path(ENCODER_FILE), joblib.load)
+    symptom_columns, col_index = REGISTRY.get(get_local_path(COLUMNS_FILE), _load_symptom_columns)
+    return lr, le, symptom_columns, col_index
 
-    # Create input vector (1 for present symptoms, 0 otherwise)
-    input_data = {col: [1 if col in input_symptoms else 0] for col in symptom_columns}
-    X_input = pd.DataFrame(input_data)
+def build_matrix(symptom_lists, col_index, n_cols):
+    """Encode N symptom lists into an (N, n_cols) int8 0/1 matrix using the column index."""
+    X = np.zeros((len(symptom_lists), n_cols), dtype=np.int8)
+    for r, symptoms in enumerate(symptom_lists):
+        for s in symptoms:
+            i = col_index.get(s)
+            if i is not None:
+                X[r, i] = 1
+    return X
 
+def predict_batch(symptom_lists):
+    """
+    Predict one disease per patient with a single model call.
+    Example input: [['depression', 'shortness_of_breath'], ['cough']]
+    """
+    lr, le, symptom_columns, col_index = load_artifacts()
+    if not symptom_lists:
+        return []
 
-    # Predict numeric label
-    pred_label = lr.predict(X_input)[0]
+    X = build_matrix(symptom_lists, col_index, len(symptom_columns))
+    X_input = pd.DataFrame(X, columns=symptom_columns)
 
-    # Convert back to disease name
-    predicted_disease = le.inverse_transform([pred_label])[0]
+    pred_labels = lr.predict(X_input)
+    return list(le.inverse_transform(pred_labels))
+
+def predict(input_symptoms: []):
+    # Example input symptoms
+    #input_symptoms = ['depression', 'shortness_of_breath']
+    predicted_disease = predict_batch([input_symptoms])[0]
 
     print("Predicted disease:", predicted_disease)
 
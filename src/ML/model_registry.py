@@ -0,0 +1,47 @@
+# src/ML/model_registry.py
+# PURPOSE: Keep model artifacts resident in the process and reload them only when the file changes.
+
+import os
+import threading
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded artifacts keyed by absolute path.
+
+    Each entry remembers the file's mtime at load time; if the file on disk is
+    replaced (e.g. a retrained model is copied over), the next get() reloads it
+    and swaps the cached object atomically. Readers never block on each other.
+    """
+
+    def __init__(self):
+        self._entries = {}  # path -> (mtime_ns, obj)
+        self._lock = threading.Lock()
+
+    def get(self, path: str, loader):
+        """Return loader(path), cached until the file's mtime changes."""
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._lock:
+            # Another thread may have reloaded while we were waiting
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != mtime:
+                obj = loader(path)
+                self._entries[path] = (mtime, obj)
+                print(f"[ModelRegistry] Loaded {os.path.basename(path)}")
+            return self._entries[path][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self) -> dict:
+        return {os.path.basename(p): mtime for p, (mtime, _) in self._entries.items()}
+
+
+# Shared instance for the whole process
+REGISTRY = ModelRegistry()
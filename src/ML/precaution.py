@@ -1,20 +1,144 @@
+import os
+import dbm
+import argparse
+import threading
 import pandas as pd
 
+# Local sources, in priority order. The first one that exists is used.
+#   1) PRECAUTION_CSV env var
+#   2) disease_sympts_prec_full.csv next to this file: a local snapshot of REMOTE_CSV, the full
+#      dataset get_precaution() originally read per call. If missing, it is downloaded once and
+#      saved here (python precaution.py --fetch, or automatically unless PRECAUTION_FETCH=0)
+#   3) MLrf/dataset2_with_precautions.csv (ships with the repo, but only 41 diseases:
+#      most LR predictions then get no precautions; check_coverage() warns about it)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REMOTE_CSV = "hf://datasets/shanover/disease_symptoms_prec_full/disease_sympts_prec_full.csv"
+FULL_CSV = os.path.join(BASE_DIR, "disease_sympts_prec_full.csv")
+SOURCES = [
+    os.environ.get("PRECAUTION_CSV", ""),
+    FULL_CSV,
+    os.path.join(BASE_DIR, "..", "MLrf", "dataset2_with_precautions.csv"),
+]
+FETCH_MISSING = os.environ.get("PRECAUTION_FETCH", "1") != "0"
+# Optional on-disk index (dbm hash file); lookups then read only the matching record
+PRECAUTION_DB = os.environ.get("PRECAUTION_DB", "")
+
+_INDEX = None
+_LOCK = threading.Lock()
+
+
+def normalize_disease(name: str) -> str:
+    """Case-fold and treat '_' as space so 'Fungal Infection' == 'fungal_infection'."""
+    return " ".join(str(name or "").replace("_", " ").split()).casefold()
+
+
+def split_precautions(value) -> list:
+    if isinstance(value, str):
+        return [p.strip() for p in value.split(',') if p.strip()]
+    if pd.notna(value):
+        return [str(value).strip()]
+    return []
+
+
+def build_index(csv_path: str) -> dict:
+    """Read (disease, precautions) columns once and return {normalized disease: [precautions]}."""
+    df = pd.read_csv(csv_path, usecols=["disease", "precautions"])
+    index = {}
+    for disease, value in zip(df["disease"], df["precautions"]):
+        key = normalize_disease(disease)
+        if key and not index.get(key):  # first non-empty row wins
+            index[key] = split_precautions(value)
+    return index
+
+
+def fetch_full_csv(dest: str = FULL_CSV) -> str:
+    """Download REMOTE_CSV once and keep only the (disease, precautions) columns at dest."""
+    df = pd.read_csv(REMOTE_CSV, usecols=["disease", "precautions"])
+    tmp = f"{dest}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, dest)
+    print(f"[precaution] Saved {len(df)} rows from {REMOTE_CSV} to {dest}")
+    return dest
+
+
+def _source_path() -> str:
+    if FETCH_MISSING and not any(os.path.exists(p) for p in SOURCES[:2] if p):
+        try:
+            fetch_full_csv()
+        except Exception as e:
+            print(f"[precaution] WARNING: could not fetch {REMOTE_CSV} ({e}); falling back to a smaller source")
+    for p in SOURCES:
+        if p and os.path.exists(p):
+            return p
+    raise FileNotFoundError(f"No precaution source found in: {[p for p in SOURCES if p]}")
+
+
+def get_index() -> dict:
+    """Build the in-memory index exactly once per process."""
+    global _INDEX
+    if _INDEX is None:
+        with _LOCK:
+            if _INDEX is None:
+                path = _source_path()
+                _INDEX = build_index(path)
+                print(f"[precaution] Indexed {len(_INDEX)} diseases from {os.path.basename(path)}")
+    return _INDEX
+
+
+def check_coverage(diseases) -> dict:
+    """
+    How many of a model's disease labels have precautions in the index (or PRECAUTION_DB).
+    Logs a warning listing examples when any are missing, since get_precaution() returns []
+    for them without an error.
+    """
+    keys = {normalize_disease(d) for d in diseases}
+    if PRECAUTION_DB and dbm.whichdb(PRECAUTION_DB):
+        with dbm.open(PRECAUTION_DB, "r") as db:
+            known = {k for k in keys if k in db}
+    else:
+        index = get_index()
+        known = {k for k in keys if index.get(k)}
+    missing = sorted(keys - known)
+    if missing:
+        print(f"[precaution] WARNING: precautions cover only {len(known)}/{len(keys)} model diseases; "
+              f"e.g. {missing[:5]} will return []. Provide {os.path.basename(FULL_CSV)} "
+              f"(python precaution.py --fetch) or set PRECAUTION_CSV / PRECAUTION_DB.")
+    return {"covered": len(known), "total": len(keys), "missing": missing}
+
+
+def save_db(db_path: str, csv_path: str = None):
+    """Write the index to a dbm file so workers can look up records without parsing the CSV."""
+    index = build_index(csv_path or _source_path())
+    with dbm.open(db_path, "n") as db:
+        for key, precautions in index.items():
+            db[key] = "\n".join(precautions)
+    print(f"[precaution] Saved {len(index)} diseases to {db_path}")
+
+
+def _lookup_db(key: str) -> list:
+    with dbm.open(PRECAUTION_DB, "r") as db:
+        value = db.get(key)
+    return value.decode("utf-8").split("\n") if value else []
+
+
 def get_precaution(disease: str):
-    df = pd.read_csv("hf://datasets/shanover/disease_symptoms_prec_full/disease_sympts_prec_full.csv")
-    result = df.loc[df['disease'].str.lower() == disease.lower(), 'precautions']
-
-    if not result.empty and pd.notna(result.values[0]):
-        value = result.values[0]
-        if isinstance(value, str):
-            precautions = [p.strip() for p in value.split(',')]
-        else:
-            precautions = [str(value).strip()]
+    key = normalize_disease(disease)
+    if PRECAUTION_DB and dbm.whichdb(PRECAUTION_DB):
+        precautions = _lookup_db(key)
     else:
-        precautions = []
+        precautions = list(get_index().get(key, []))
 
     print(precautions)
     return precautions
 
 if __name__ == "__main__":
-    get_precaution("Fungal Infection")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Disease -> precautions lookup.")
+    parser.add_argument("--fetch", action="store_true", help=f"Download {os.path.basename(FULL_CSV)} next to this file")
+    parser.add_argument("--save-db", type=str, help="Write the index to this dbm file (use with PRECAUTION_DB)")
+    args = parser.parse_args()
+    if args.fetch:
+        fetch_full_csv()
+    if args.save_db:
+        save_db(args.save_db)
+    if not (args.fetch or args.save_db):
+        get_precaution("Fungal Infection")
@@ -0,0 +1,154 @@
+# distill_rf.py
+# Shrink the trained RF (model_rf.joblib) into smaller deployment candidates and report
+# top-1 / top-3 accuracy, agreement with the full forest, latency and memory for each.
+#
+# Usage: python distill_rf.py [--bundle model_rf.joblib] [--report distill_report.json]
+#                             [--save NAME --out model_small.joblib]
+#
+# Candidates:
+#   teacher          the bundle's forest as-is
+#   prune_<n>        the first n trees of the teacher (no retraining)
+#   rf_<n>_d<depth>  a small depth-capped forest fit on the teacher's predicted labels
+#   logreg / bnb     multinomial logistic regression / Bernoulli NB fit on the teacher's
+#                    predict_proba (soft targets, as per-class sample weights)
+# Forests are also timed through the flat NumPy evaluator (forest_npz.FlatForest).
+import argparse
+import copy
+import json
+import pickle
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import BernoulliNB
+
+from forest_npz import FlatForest, file_sha256, flatten_forest
+from trainrf import CSV_PATH, MODEL_PATH, RANDOM_SEED, preprocess, split_holdout
+
+PRUNE_TREES = [10, 25, 50]
+SMALL_FORESTS = [(25, 8), (50, 12)]  # (n_estimators, max_depth)
+SOFT_MIN_P = 0.01  # teacher probabilities below this are dropped from the soft targets
+LATENCY_RUNS = 50
+
+
+def load_split(bundle):
+    """dataset2 → the same held-out split trainrf used, in the bundle's feature order."""
+    X, y, _ = preprocess(str(CSV_PATH), file_sha256(CSV_PATH))
+    X = X.reindex(columns=bundle["feature_cols"], fill_value=0).astype(np.float32)
+    X_tr, X_te, y_tr, y_te, _ = split_holdout(X, y)
+    return X_tr, X_te, y_tr, y_te
+
+
+def prune(forest, n_trees: int):
+    small = copy.copy(forest)
+    small.estimators_ = forest.estimators_[:n_trees]
+    small.n_estimators = len(small.estimators_)
+    return small
+
+
+def soft_fit(model, X, proba, classes):
+    """Fit on teacher probabilities: one weighted row per (sample, class) with p >= SOFT_MIN_P."""
+    rows, cols = np.nonzero(proba >= SOFT_MIN_P)
+    return model.fit(X[rows], classes[cols], sample_weight=proba[rows, cols])
+
+
+def topk_hits(proba, classes, y, k):
+    top = classes[np.argsort(proba, axis=1)[:, ::-1][:, :k]]
+    return float((top == y[:, None]).any(axis=1).mean())
+
+
+def latency_ms(fn, X):
+    """Median wall time of one call, for a single row and for the whole test batch."""
+    out = {}
+    for name, batch in (("row", X[:1]), ("batch", X)):
+        fn(batch)  # warm-up
+        times = []
+        for _ in range(LATENCY_RUNS if name == "row" else 5):
+            t0 = time.perf_counter()
+            fn(batch)
+            times.append((time.perf_counter() - t0) * 1000)
+        out[name] = round(float(np.median(times)), 3)
+    return out
+
+
+def evaluate(name, model, X_te, y_te, teacher_top1, classes=None):
+    """classes: label per predict_proba column (needed for FlatForest, which has no classes_)."""
+    predict_proba = model.predict_proba
+    P = predict_proba(X_te)
+    flat = classes is not None
+    classes = classes if flat else model.classes_
+    if flat:
+        size = sum(a.nbytes for a in vars(model).values() if isinstance(a, np.ndarray))
+    else:
+        size = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    lat = latency_ms(predict_proba, X_te)
+    return {
+        "model": name,
+        "top1": round(topk_hits(P, classes, y_te, 1), 4),
+        "top3": round(topk_hits(P, classes, y_te, 3), 4),
+        "agree_top1": round(float((classes[P.argmax(axis=1)] == teacher_top1).mean()), 4),
+        "latency_row_ms": lat["row"],
+        "latency_batch_ms": lat["batch"],
+        "size_mb": round(size / 2**20, 3),
+    }
+
+
+def build_candidates(teacher, X_tr):
+    P_tr = teacher.predict_proba(X_tr)
+    hard = teacher.classes_[P_tr.argmax(axis=1)]
+    cands = {"teacher": teacher}
+    for n in PRUNE_TREES:
+        if n < len(teacher.estimators_):
+            cands[f"prune_{n}"] = prune(teacher, n)
+    for n, depth in SMALL_FORESTS:
+        cands[f"rf_{n}_d{depth}"] = RandomForestClassifier(
+            n_estimators=n, max_depth=depth, random_state=RANDOM_SEED, n_jobs=1
+        ).fit(X_tr, hard)
+    cands["logreg"] = soft_fit(LogisticRegression(max_iter=2000), X_tr, P_tr, teacher.classes_)
+    cands["bnb"] = soft_fit(BernoulliNB(binarize=0.5), X_tr, P_tr, teacher.classes_)
+    return cands
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune / distill the RF and report accuracy, latency, memory.")
+    parser.add_argument("--bundle", type=str, default=str(MODEL_PATH))
+    parser.add_argument("--report", type=str, default="distill_report.json")
+    parser.add_argument("--save", type=str, help="Candidate name to save as a bundle (e.g. rf_25_d8)")
+    parser.add_argument("--out", type=str, default="model_small.joblib")
+    args = parser.parse_args()
+
+    bundle = joblib.load(args.bundle)
+    teacher = bundle["model"]
+    X_tr, X_te, y_tr, y_te = load_split(bundle)
+    X_tr, X_te = X_tr.to_numpy(), X_te.to_numpy()
+    teacher_top1 = teacher.classes_[teacher.predict_proba(X_te).argmax(axis=1)]
+    print(f"[INFO] train={len(X_tr)}, test={len(X_te)}, features={X_tr.shape[1]}")
+
+    cands = build_candidates(teacher, X_tr)
+    rows = []
+    for name, model in cands.items():
+        rows.append(evaluate(name, model, X_te, y_te, teacher_top1))
+        if isinstance(model, RandomForestClassifier):
+            flat = FlatForest(flatten_forest(model))
+            rows.append(evaluate(f"{name}+flat", flat, X_te, y_te, teacher_top1, classes=model.classes_))
+
+    print(pd.DataFrame(rows).to_string(index=False))
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(rows, f, indent=2)
+    print(f"[INFO] Report written to {args.report}")
+
+    if args.save:
+        if args.save not in cands:
+            parser.error(f"unknown candidate '{args.save}', choose from {list(cands)}")
+        small = dict(bundle, model=cands[args.save])
+        joblib.dump(small, args.out)
+        print(f"[INFO] Saved {args.save} bundle to {args.out}")
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    main()
@@ -0,0 +1,55 @@
+# feature_encoder.py
+# One symptom-name → feature-index encoder shared by run_rf, predict_rf and predict_rf2.
+#
+# Built once per loaded bundle; encoding a request costs O(#symptoms), not O(#features):
+# names become a sparse index list, and symptom_sum / symptom_ratio come from its length
+# instead of summing the binary columns.
+import numpy as np
+
+DERIVED_COLS = ("symptom_sum", "symptom_ratio")
+
+
+def normalize_name(name) -> str:
+    """'Sore_Throat ' and 'sore throat' → 'sore throat' (column names and NLP output alike)."""
+    return " ".join(str(name or "").replace("_", " ").lower().split())
+
+
+class FeatureEncoder:
+    def __init__(self, feature_cols, bin_cols=None):
+        self.feature_cols = list(feature_cols)
+        self.n_features = len(self.feature_cols)
+        self.col_index = {c: i for i, c in enumerate(self.feature_cols)}
+        if bin_cols:
+            bins = [c for c in bin_cols if c in self.col_index]
+            self.n_bin = len(bin_cols)  # ratio denominator, as at training time
+        else:
+            bins = [c for c in self.feature_cols if c not in DERIVED_COLS]
+            self.n_bin = len(bins)
+        self.bin_idx = np.array([self.col_index[c] for c in bins], dtype=np.intp)
+        self.key_index = {normalize_name(c): self.col_index[c] for c in bins}
+        self.sum_i = self.col_index.get("symptom_sum")
+        self.ratio_i = self.col_index.get("symptom_ratio")
+
+    def indices(self, names) -> list:
+        """Sorted, de-duplicated feature indices of the known symptom names."""
+        hits = {self.key_index.get(normalize_name(n)) for n in names}
+        hits.discard(None)
+        return sorted(hits)
+
+    def transform(self, name_lists) -> np.ndarray:
+        """N symptom-name lists → (N, n_features) float32 matrix in feature_cols order."""
+        X = np.zeros((len(name_lists), self.n_features), dtype=np.float32)
+        for r, names in enumerate(name_lists):
+            idx = self.indices(names)
+            X[r, idx] = 1
+            count = len(idx)
+            if self.sum_i is not None:
+                X[r, self.sum_i] = count
+            if self.ratio_i is not None:
+                X[r, self.ratio_i] = count / max(self.n_bin, 1)
+        return X
+
+    def transform_nlp(self, nlp_jsons) -> np.ndarray:
+        """combine_features() outputs → feature matrix."""
+        return self.transform([[s.get("name") for s in j.get("symptoms", [])] for j in nlp_jsons])
+
@@ -0,0 +1,229 @@
+# forest_npz.py
+# Flat NumPy export of a fitted RandomForestClassifier bundle + a pure-NumPy batch evaluator.
+#
+# Export:  python forest_npz.py model_rf_compressed2.joblib [--out model_rf_compressed2.npz]
+#
+# All trees are concatenated into per-node arrays (feature / threshold / left / right / leaf);
+# leaf class distributions are stored sparsely (CSR: leaf_ptr / leaf_cls / leaf_p), since most
+# leaves are pure. Written with np.savez (stored, not deflated); load_flat() memory-maps every
+# member straight out of the zip, so loading is near-instant and worker processes share the pages.
+# The source .joblib's size, mtime and sha256 are stored too, so a stale export can be detected
+# after a retrain without hashing the joblib on every load (see matches_source()).
+import argparse
+import hashlib
+import json
+import os
+import struct
+import zipfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+FORMAT_VERSION = 1
+_ZIP_LOCAL_HEADER = 30  # fixed part of a zip local file header
+
+
+def file_sha256(path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FlatForest:
+    """
+    predict_proba() over the flat arrays: all (row, tree) pairs descend together, one level
+    per step, and pairs drop out as they reach a leaf, so a batch costs a few vectorized
+    gathers per level instead of n_trees Python tree walks.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.leaf = arrays["leaf"]
+        self.leaf_ptr = arrays["leaf_ptr"]
+        self.leaf_cls = arrays["leaf_cls"]
+        self.leaf_p = arrays["leaf_p"]
+        self.roots = arrays["roots"]
+        self.n_classes = int(arrays["n_classes"])
+        self.n_features_in_ = int(arrays["n_features"])
+
+    def apply(self, X) -> np.ndarray:
+        """Leaf node index per (row, tree), shape (n_rows, n_trees)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_trees = len(X), len(self.roots)
+        node = np.tile(self.roots, n)
+        row_base = np.repeat(np.arange(n, dtype=np.int64) * X.shape[1], n_trees)
+        flat_x = X.ravel()
+        active = np.flatnonzero(self.left[node] >= 0)
+        while active.size:
+            nd = node[active]
+            go_left = flat_x[row_base[active] + self.feature[nd]] <= self.threshold[nd]
+            nd = np.where(go_left, self.left[nd], self.right[nd])
+            node[active] = nd
+            active = active[self.left[nd] >= 0]
+        return node.reshape(n, n_trees)
+
+    def predict_proba(self, X, chunk_size: int = 1024) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        n_trees, c = len(self.roots), self.n_classes
+        out = np.empty((len(X), c), dtype=np.float64)
+        for s in range(0, len(X), chunk_size):
+            leaves = self.leaf[self.apply(X[s:s + chunk_size]).ravel()]
+            start = self.leaf_ptr[leaves]
+            count = self.leaf_ptr[leaves + 1] - start
+            # expand every leaf's CSR slice, then sum per (row, class)
+            first = np.repeat(start - (np.cumsum(count) - count), count)
+            entry = first + np.arange(count.sum())
+            rows = np.repeat(np.arange(len(leaves)) // n_trees, count)
+            m = len(leaves) // n_trees
+            acc = np.bincount(rows * c + self.leaf_cls[entry], weights=self.leaf_p[entry], minlength=m * c)
+            out[s:s + m] = acc.reshape(m, c) / n_trees
+        return out
+
+    def predict(self, X) -> np.ndarray:
+        return self.predict_proba(X).argmax(axis=1)
+
+
+def flatten_forest(model) -> dict:
+    """RandomForestClassifier → concatenated node arrays (child indices are global)."""
+    feats, thrs, lefts, rights, leaf_ids, roots = [], [], [], [], [], []
+    leaf_cls, leaf_p, leaf_nnz = [], [], []
+    offset, n_leaves = 0, 0
+    for est in model.estimators_:
+        t = est.tree_
+        is_leaf = t.children_left < 0
+        roots.append(offset)
+        feats.append(np.where(is_leaf, 0, t.feature).astype(np.int32))
+        thrs.append(t.threshold.astype(np.float64))  # float64, as sklearn compares
+        lefts.append(np.where(is_leaf, -1, t.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, t.children_right + offset).astype(np.int32))
+        ids = np.full(t.node_count, -1, dtype=np.int32)
+        ids[is_leaf] = np.arange(n_leaves, n_leaves + is_leaf.sum())
+        leaf_ids.append(ids)
+
+        v = t.value[is_leaf, 0, :]
+        v = v / np.maximum(v.sum(axis=1, keepdims=True), 1e-12)
+        r, cls = np.nonzero(v)
+        leaf_cls.append(cls.astype(np.int16))
+        leaf_p.append(v[r, cls].astype(np.float32))
+        leaf_nnz.append(np.bincount(r, minlength=len(v)))
+        offset += t.node_count
+        n_leaves += len(v)
+    return {
+        "feature": np.concatenate(feats),
+        "threshold": np.concatenate(thrs),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "leaf": np.concatenate(leaf_ids),
+        "leaf_ptr": np.concatenate([[0], np.cumsum(np.concatenate(leaf_nnz))]).astype(np.int64),
+        "leaf_cls": np.concatenate(leaf_cls),
+        "leaf_p": np.concatenate(leaf_p),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "n_classes": np.int32(len(model.classes_)),
+        "n_features": np.int32(model.n_features_in_),
+    }
+
+
+def export_bundle(bundle: dict, out_path, source_path=None) -> Path:
+    """
+    Write a joblib RF bundle (model, label_encoder, feature_cols, ...) as a flat .npz.
+    source_path: the .joblib the bundle was saved to; its sha256 ties the export to it.
+    """
+    model, le = bundle["model"], bundle["label_encoder"]
+    arrays = flatten_forest(model)
+    # disease name for each predict_proba column
+    arrays["classes"] = np.asarray(le.inverse_transform(model.classes_), dtype=str)
+    arrays["feature_cols"] = np.asarray(bundle["feature_cols"], dtype=str)
+    arrays["bin_cols"] = np.asarray(bundle.get("bin_cols", []), dtype=str)
+    arrays["precautions_map"] = np.asarray(json.dumps(bundle.get("precautions_map", {}), default=str))
+    if source_path:
+        st = os.stat(source_path)
+        arrays["source_size"] = np.int64(st.st_size)
+        arrays["source_mtime_ns"] = np.int64(st.st_mtime_ns)
+        arrays["source_sha256"] = np.asarray(file_sha256(source_path))
+    arrays["format_version"] = np.int32(FORMAT_VERSION)
+    out_path = Path(out_path)
+    np.savez(out_path, **arrays)  # uncompressed, so members can be memory-mapped
+    return out_path
+
+
+def _mmap_npz(path) -> dict:
+    """Memory-map each .npy member of an uncompressed .npz (np.load ignores mmap_mode for .npz)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: member {info.filename} is compressed; re-export with np.savez")
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = struct.unpack("<HH", f.read(4))
+            f.seek(info.header_offset + _ZIP_LOCAL_HEADER + name_len + extra_len)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if not shape:  # scalars: not worth a mapping
+                arrays[name] = np.fromfile(f, dtype=dtype, count=1)[0]
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(),
+                                         shape=shape, order="F" if fortran else "C")
+    return arrays
+
+
+def load_flat(path) -> dict:
+    """
+    Load an exported .npz as a bundle dict compatible with predict_rf2:
+    {"model": FlatForest, "classes", "feature_cols", "bin_cols", "precautions_map", "source"}.
+    source is {"size", "mtime_ns", "sha256"} of the exported .joblib, or None if not recorded.
+    """
+    arrays = _mmap_npz(path)
+    if int(arrays["format_version"]) != FORMAT_VERSION:
+        raise ValueError(f"{path}: format {int(arrays['format_version'])}, expected {FORMAT_VERSION}")
+    return {
+        "model": FlatForest(arrays),
+        "classes": np.asarray(arrays["classes"]),
+        "feature_cols": arrays["feature_cols"].tolist(),
+        "bin_cols": arrays["bin_cols"].tolist(),
+        "precautions_map": json.loads(str(arrays["precautions_map"])),
+        "source": {
+            "size": int(arrays["source_size"]),
+            "mtime_ns": int(arrays["source_mtime_ns"]),
+            "sha256": str(arrays["source_sha256"]),
+        } if "source_size" in arrays else None,
+    }
+
+
+def matches_source(flat: dict, joblib_path) -> bool:
+    """
+    Whether a load_flat() bundle was exported from joblib_path as it is now. Size + mtime
+    decide without reading the joblib; only a same-size file with a different mtime
+    (e.g. copied without preserving times) is hashed to confirm.
+    """
+    src = flat.get("source")
+    if src is None:
+        return False
+    st = os.stat(joblib_path)
+    if st.st_size != src["size"]:
+        return False
+    return st.st_mtime_ns == src["mtime_ns"] or file_sha256(joblib_path) == src["sha256"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a joblib RF bundle to a flat, mmap-able .npz.")
+    parser.add_argument("bundle", type=str, help="joblib bundle with model / label_encoder / feature_cols")
+    parser.add_argument("--out", type=str, help="Output .npz (default: bundle path with .npz suffix)")
+    args = parser.parse_args()
+
+    src = Path(args.bundle)
+    out = export_bundle(joblib.load(src), args.out or src.with_suffix(".npz"), source_path=src)
+    print(f"[INFO] {src} ({src.stat().st_size / 2**20:.1f} MB) -> {out} ({out.stat().st_size / 2**20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import joblib
 import numpy as np
 import pandas as pd
 from entext_train import extract_features, combine_features  # Use  existing NLP extraction logic
+from feature_encoder import FeatureEncoder
 
 # 1. Load the trained Random Forest model 
 MODEL_PATH = "src\MLrf\model_rf.pkl"  # or "model_rf.pkl" 
@@ -10,6 +11,7 @@ bundle = joblib.load(MODEL_PATH)
 model = bundle["model"]                  # Extract the trained RandomForest model
 label_encoder = bundle["label_encoder"]  # Extract label encoder for decoding predictions
 feature_cols = bundle["feature_cols"]    # Feature column names used during training
+encoder = FeatureEncoder(feature_cols)    # symptom name -> column index, built once
 
 print(f" Model loaded from {MODEL_PATH}")
 print(f" Total features used: {len(feature_cols)}")
@@ -31,14 +33,11 @@ def predict_disease_from_text(text: str, topk: int = 3):
     combined = combine_features(extracted)
 
     # Step 2: Build a binary feature vector (1 = symptom present, 0 = absent)
+    #         via the shared encoder ("sore throat" -> sore_throat, plus symptom_sum / symptom_ratio)
     symptom_names = [s["name"] for s in combined.get("symptoms", [])]
-    X_dict = {c: 0 for c in feature_cols}  # Initialize all features to 0
-    for s in symptom_names:
-        if s in X_dict:
-            X_dict[s] = 1
 
     # Step 3: Create DataFrame for model input (keep same column order)
-    X_df = pd.DataFrame([X_dict])[feature_cols]
+    X_df = pd.DataFrame(encoder.transform([symptom_names]), columns=feature_cols)
 
     # Step 4: Predict with model
     try:
@@ -1,60 +1,99 @@
+import os
 import pandas as pd
+import numpy as np
 import joblib
 
-def predict(input_symptoms: []):
-    # """
-    # Predict disease from a list of underscore symptoms using the trained Random Forest model.
-    # Example input: ['fever', 'shortness_of_breath', 'cough']
-    # """
+from feature_encoder import FeatureEncoder
+from forest_npz import load_flat, matches_source
 
-    #  Load model bundle
-    bundle = joblib.load('model_rf_compressed2.joblib')     
-    #model_rf_light2.joblib for lighter model
-    # src/MLrf/
-    rf_model = bundle["model"]
-    le = bundle["label_encoder"]
-    feature_cols = bundle["feature_cols"]
-    bin_cols = bundle.get("bin_cols", [])
-    precautions_map = bundle.get("precautions_map", {})
+BUNDLE_PATH = 'model_rf_compressed2.joblib'
+#model_rf_light2.joblib for lighter model
+# src/MLrf/
+# Flat export of the same bundle (python forest_npz.py model_rf_compressed2.joblib); preferred when
+# present and exported from the current joblib (forest_npz.matches_source), else the joblib is used
+FLAT_BUNDLE_PATH = 'model_rf_compressed2.npz'
 
-    # Build input DataFrame
-    # All features initialized to 0
-    input_data = {col: [1 if col in input_symptoms else 0] for col in feature_cols}
+_BUNDLE = None
 
-    # Compute derived features if expected
-    if "symptom_sum" in feature_cols:
-        input_data["symptom_sum"] = [sum(input_data.get(c, [0])[0] for c in bin_cols)]
-    if "symptom_ratio" in feature_cols and len(bin_cols) > 0:
-        total = len(bin_cols)
-        input_data["symptom_ratio"] = [input_data["symptom_sum"][0] / total]
+def load_bundle():
+    """Load the model bundle once and build its feature encoder."""
+    global _BUNDLE
+    if _BUNDLE is None:
+        bundle = None
+        if os.path.exists(FLAT_BUNDLE_PATH):
+            flat = load_flat(FLAT_BUNDLE_PATH)  # memory-mapped, no unpickling
+            if not os.path.exists(BUNDLE_PATH) or matches_source(flat, BUNDLE_PATH):
+                bundle = flat
+            else:
+                print(f"[WARN] {FLAT_BUNDLE_PATH} was not exported from the current {BUNDLE_PATH}; "
+                      f"ignoring it (re-export with: python forest_npz.py {BUNDLE_PATH})")
+        if bundle is None:
+            bundle = joblib.load(BUNDLE_PATH)
+            model, le = bundle["model"], bundle["label_encoder"]
+            bundle["classes"] = np.asarray(le.inverse_transform(model.classes_))
+        bundle["encoder"] = FeatureEncoder(bundle["feature_cols"], bundle.get("bin_cols"))
+        _BUNDLE = bundle
+    return _BUNDLE
 
-    # Keep consistent feature order
-    X_input = pd.DataFrame(input_data)[feature_cols]
+def build_matrix(symptom_lists, bundle):
+    """
+    Encode N symptom lists into an (N, n_features) float32 matrix in feature_cols order,
+    filling symptom_sum / symptom_ratio when the model expects them.
+    """
+    return bundle["encoder"].transform(symptom_lists)
 
-    # Predict disease 
+def predict_batch(symptom_lists):
+    """
+    Predict diseases for N patients with one predict_proba call.
+    Example input: [['fever', 'cough'], ['skin_rash', 'itching']]
+    """
+    bundle = load_bundle()
+    rf_model = bundle["model"]
+    precautions_map = bundle.get("precautions_map", {})
+    if not symptom_lists:
+        return []
+
+    X_input = build_matrix(symptom_lists, bundle)
+    if "label_encoder" in bundle:  # sklearn model was fit with feature names
+        X_input = pd.DataFrame(X_input, columns=bundle["feature_cols"])
+
+    # Predict disease
     try:
-        pred_probs = rf_model.predict_proba(X_input)[0]
-        pred_idx = pred_probs.argmax()
-        predicted_disease = le.inverse_transform([pred_idx])[0]
-        probability = float(pred_probs[pred_idx])
+        pred_probs = rf_model.predict_proba(X_input)
+        pred_idx = pred_probs.argmax(axis=1)
+        probabilities = [float(p) for p in pred_probs[np.arange(len(pred_idx)), pred_idx]]
+        diseases = bundle["classes"][pred_idx]
     except Exception:
-        pred_label = rf_model.predict(X_input)[0]
-        predicted_disease = le.inverse_transform([pred_label])[0]
-        probability = None
+        if "label_encoder" not in bundle:  # flat forest: no predict() fallback, keep the real error
+            raise
+        pred_idx = rf_model.predict(X_input)
+        probabilities = [None] * len(pred_idx)
+        diseases = bundle["label_encoder"].inverse_transform(pred_idx)
 
-    #  Get precautions if available 
-    precautions = precautions_map.get(predicted_disease, "")
+    #  Get precautions if available
+    return [
+        {
+            "disease": str(d),
+            "probability": p,
+            "precautions": precautions_map.get(d, "")
+        }
+        for d, p in zip(diseases, probabilities)
+    ]
+
+def predict(input_symptoms: []):
+    # """
+    # Predict disease from a list of underscore symptoms using the trained Random Forest model.
+    # Example input: ['fever', 'shortness_of_breath', 'cough']
+    # """
+    result = predict_batch([input_symptoms])[0]
+    probability = result["probability"]
 
-    print(f"Predicted Disease: {predicted_disease}")
+    print(f"Predicted Disease: {result['disease']}")
     print(f"Probability: {probability:.2%}" if probability else "Probability: N/A")
-    if precautions:
-        print(f"Precautions: {precautions}")
+    if result["precautions"]:
+        print(f"Precautions: {result['precautions']}")
 
-    return {
-        "disease": predicted_disease,
-        "probability": probability,
-        "precautions": precautions
-    }
+    return result
 
 
 # --- Quick test example ---
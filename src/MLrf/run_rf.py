@@ -8,6 +8,7 @@ import pandas as pd
 
 # ==== 1) 导入你的NLP抽取 ====
 from entext_train import extract_features, combine_features  # 确保同目录或已在PYTHONPATH
+from feature_encoder import FeatureEncoder
 
 BUNDLE_PATHS = [
     Path(__file__).with_name("model_rf.joblib"),
@@ -16,54 +17,47 @@ BUNDLE_PATHS = [
 ]
 
 def load_bundle():
+    """加载 bundle，并按其 feature_cols 构建一次 FeatureEncoder（bundle["encoder"]）。"""
     for p in BUNDLE_PATHS:
         if p.exists():
-            return joblib.load(p)
+            bundle = joblib.load(p)
+            bundle["encoder"] = FeatureEncoder(bundle["feature_cols"], bundle.get("bin_cols"))
+            return bundle
     raise FileNotFoundError(f"Cannot find model bundle in: {BUNDLE_PATHS}")
 
-def vectorize_from_nlp(nlp_json: dict, feature_cols: list[str]) -> pd.DataFrame:
+def vectorize_from_nlp(nlp_json: dict, encoder: FeatureEncoder) -> pd.DataFrame:
     """
     将 combine_features() 的结果转为一行特征：
     - 症状名命中 → 1，否则 0
     - 自动补充 symptom_sum / symptom_ratio
     """
-    present = set()
-    if "symptoms" in nlp_json:
-        for item in nlp_json["symptoms"]:
-            name = (item.get("name") or "").strip().lower()
-            if name:
-                present.add(name)
+    return vectorize_batch_from_nlp([nlp_json], encoder)
 
-    # 先全0
-    row = {c: 0 for c in feature_cols}
-
-    # 命中特征置1（仅对二进制症状列；衍生列稍后计算）
-    bin_cols = [c for c in feature_cols if c not in ("symptom_sum", "symptom_ratio")]
-    for col in bin_cols:
-        # 特征列名和症状名通常一致（都为小写+下划线/空格处理后）
-        # 保险起见做个宽松匹配：把列名里的下划线替换空格对比
-        key = col.replace("_", " ").strip().lower()
-        if key in present:
-            row[col] = 1
-
-    # 填充衍生特征
-    bin_vals = [row[c] for c in bin_cols]
-    ssum = int(sum(bin_vals))
-    row["symptom_sum"] = ssum if "symptom_sum" in feature_cols else 0
-    row["symptom_ratio"] = (ssum / max(len(bin_cols), 1)) if "symptom_ratio" in feature_cols else 0.0
-
-    return pd.DataFrame([row], columns=feature_cols)
+def vectorize_batch_from_nlp(nlp_jsons: list[dict], encoder: FeatureEncoder) -> pd.DataFrame:
+    """
+    批量版 vectorize_from_nlp：N 条 combine_features() 结果 → 一个 (N, n_features) 矩阵。
+    列名 "sore_throat" 与症状名 "sore throat" 通过 FeatureEncoder 对齐（由 load_bundle() 构建一次）。
+    """
+    X = encoder.transform_nlp(nlp_jsons)
+    return pd.DataFrame(X, columns=encoder.feature_cols)
 
 def predict_topk(model, X_row: pd.DataFrame, le, k: int = 3):
+    return predict_topk_batch(model, X_row, le, k=k)[0]
+
+def predict_topk_batch(model, X: pd.DataFrame, le, k: int = 3):
+    """一次 predict_proba 调用得到每一行的 top-k。"""
     proba = getattr(model, "predict_proba", None)
     if proba is None:
         # 一些模型未实现 predict_proba（RF有）
-        preds = model.predict(X_row)
+        preds = model.predict(X)
         labels = le.inverse_transform(preds)
-        return [{"disease": labels[0], "prob": 1.0}]
-    p = model.predict_proba(X_row)[0]
-    idx = np.argsort(p)[::-1][:k]
-    return [{"disease": le.classes_[i], "prob": float(p[i])} for i in idx]
+        return [[{"disease": lab, "prob": 1.0}] for lab in labels]
+    P = model.predict_proba(X)
+    idx = np.argsort(P, axis=1)[:, ::-1][:, :k]
+    return [
+        [{"disease": le.classes_[i], "prob": float(p[i])} for i in row_idx]
+        for p, row_idx in zip(P, idx)
+    ]
 
 def main():
     parser = argparse.ArgumentParser()
@@ -74,12 +68,11 @@ def main():
     bundle = load_bundle()
     model = bundle["model"]
     le = bundle["label_encoder"]
-    feature_cols = bundle["feature_cols"]
 
     nlp_feats = extract_features(args.text)
     nlp_json = combine_features(nlp_feats)
 
-    X_row = vectorize_from_nlp(nlp_json, feature_cols)
+    X_row = vectorize_from_nlp(nlp_json, bundle["encoder"])
     topk = predict_topk(model, X_row, le, k=args.topk)
 
     out = {
@@ -1,19 +1,43 @@
 # train_rf.py
+# Usage: python trainrf.py [--search grid|halving] [--cache-dir .train_cache] [--no-cache] [--export-npz]
+import argparse
+import time
+from contextlib import contextmanager
+
 import numpy as np
 import pandas as pd
 from pathlib import Path
-from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401  (enables HalvingGridSearchCV)
+from sklearn.model_selection import train_test_split, StratifiedKFold, GridSearchCV, HalvingGridSearchCV
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, f1_score, classification_report, top_k_accuracy_score
 from sklearn.ensemble import RandomForestClassifier
 import joblib
 import warnings
 
+from forest_npz import export_bundle, file_sha256
+
 CSV_PATH = Path(__file__).with_name("dataset2.csv")  # 你的0/1症状数据
 MODEL_PATH = Path(__file__).with_name("model_rf.joblib")
 RANDOM_SEED = 42
 TEST_BASE_RATIO = 0.20
 CV_K_MAX = 5
+CACHE_DIR = Path(__file__).with_name(".train_cache")  # joblib.Memory: preprocessed matrix + fold splits
+
+# successive halving: tree count is the resource, so early rounds fit small forests
+HALVING_MIN_TREES = 50
+HALVING_MAX_TREES = 500
+HALVING_FACTOR = 3
+
+STAGE_TIMES = {}
+
+@contextmanager
+def stage(name: str):
+    """Record and print the wall time of one training stage."""
+    t0 = time.perf_counter()
+    yield
+    STAGE_TIMES[name] = time.perf_counter() - t0
+    print(f"[TIME] {name:<12} {STAGE_TIMES[name]:.2f}s")
 
 def is_yes_no_col(s: pd.Series) -> bool:
     if s.dtype != "object":
@@ -21,11 +45,12 @@ def is_yes_no_col(s: pd.Series) -> bool:
     vals = set(s.dropna().unique().tolist())
     return vals.issubset({"Yes", "No"})
 
-def main():
-    if not CSV_PATH.exists():
-        raise FileNotFoundError(f"Missing {CSV_PATH}")
-
-    df = pd.read_csv(CSV_PATH)
+def preprocess(csv_path: str, csv_sha256: str):
+    """
+    CSV → (X, y, label_encoder). csv_sha256 is only part of the cache key, so the
+    joblib.Memory entry is reused until the file content changes.
+    """
+    df = pd.read_csv(csv_path)
     df.columns = [c.strip().replace(" ", "_") for c in df.columns]
     assert "Disease" in df.columns, "Expect a 'Disease' column"
     df = df.dropna(subset=["Disease"]).reset_index(drop=True)
@@ -51,13 +76,18 @@ def main():
     if dup_mask.any():
         X = X.loc[:, ~dup_mask]
 
-    feature_names = X.columns.tolist()
+    # 0/1 columns stored as int8 (the cached matrix is ~8x smaller than int64)
+    bin_cols = [c for c in bin_cols if c in X.columns]
+    X[bin_cols] = X[bin_cols].astype("int8")
 
     # 目标 target
     y_raw = df["Disease"].astype(str)
     le = LabelEncoder()
     y = le.fit_transform(y_raw)
+    return X, y, le
 
+def split_holdout(X, y):
+    """Stratified train/test split; returns (X_tr, X_te, y_tr, y_te, test_ratio)."""
     # 自适应测试集占比（保证每类至少能进测试集） self-adaptive test set ratio
     n_classes = len(np.unique(y))
     n_samples = len(y)
@@ -72,6 +102,26 @@ def main():
         X_tr, X_te, y_tr, y_te = train_test_split(
             X, y, test_size=test_ratio, random_state=RANDOM_SEED, stratify=None
         )
+    return X_tr, X_te, y_tr, y_te, test_ratio
+
+def make_splits(y_tr, k: int, seed: int):
+    """Stratified fold indices, materialized so they can be cached and reused by every candidate."""
+    cv = StratifiedKFold(n_splits=k, shuffle=True, random_state=seed)
+    return [(tr, va) for tr, va in cv.split(np.zeros(len(y_tr)), y_tr)]
+
+def main(search: str = "grid", cache_dir=CACHE_DIR, export_npz: bool = False):
+    if not CSV_PATH.exists():
+        raise FileNotFoundError(f"Missing {CSV_PATH}")
+
+    memory = joblib.Memory(str(cache_dir) if cache_dir else None, verbose=0)
+
+    with stage("preprocess"):
+        X, y, le = memory.cache(preprocess)(str(CSV_PATH), file_sha256(CSV_PATH))
+    feature_names = X.columns.tolist()
+
+    X_tr, X_te, y_tr, y_te, test_ratio = split_holdout(X, y)
+    n_classes = len(np.unique(y))
+    n_samples = len(y)
 
     print(f"[INFO] samples={n_samples}, classes={n_classes}, test_ratio={test_ratio:.3f}")
     print(f"[INFO] train={X_tr.shape[0]}, test={X_te.shape[0]}, features={X_tr.shape[1]}")
@@ -88,7 +138,8 @@ def main():
 
     min_count = int(np.min(np.bincount(y_tr)))
     k = int(max(2, min(CV_K_MAX, min_count)))
-    cv = StratifiedKFold(n_splits=k, shuffle=True, random_state=RANDOM_SEED)
+    with stage("splits"):
+        cv = memory.cache(make_splits)(y_tr, k, RANDOM_SEED)
     print(f"[INFO] CV folds = {k} (min_count_in_train={min_count})")
 
     param_grid = [{
@@ -98,15 +149,37 @@ def main():
         "min_samples_leaf": [1, 2]
     }]
 
-    grid = GridSearchCV(
-        estimator=rf,
-        param_grid=param_grid,
-        scoring="f1_macro",
-        cv=cv,
-        n_jobs=-1,
-        verbose=0
-    )
-    grid.fit(X_tr, y_tr)
+    if search == "halving":
+        # n_estimators is the halving resource, so it leaves the grid
+        param_grid = [{p: v for p, v in g.items() if p != "n_estimators"} for g in param_grid]
+        grid = HalvingGridSearchCV(
+            estimator=rf,
+            param_grid=param_grid,
+            resource="n_estimators",
+            min_resources=HALVING_MIN_TREES,
+            max_resources=HALVING_MAX_TREES,
+            factor=HALVING_FACTOR,
+            scoring="f1_macro",
+            cv=cv,
+            n_jobs=-1,
+            random_state=RANDOM_SEED,
+            verbose=0
+        )
+    else:
+        grid = GridSearchCV(
+            estimator=rf,
+            param_grid=param_grid,
+            scoring="f1_macro",
+            cv=cv,
+            n_jobs=-1,
+            verbose=0
+        )
+    with stage("search"):
+        grid.fit(X_tr, y_tr)
+
+    if search == "halving":
+        for it, (n_cand, n_res) in enumerate(zip(grid.n_candidates_, grid.n_resources_)):
+            print(f"[INFO] halving round {it}: {n_cand} candidates x {n_res} trees")
 
     print("\n== Best CV params ==")
     print(grid.best_params_)
@@ -115,6 +188,7 @@ def main():
     best_model = grid.best_estimator_
 
     # 测试集评估 test set evaluation
+    eval_t0 = time.perf_counter()
     try:
         proba = best_model.predict_proba(X_te)
         y_pred = proba.argmax(axis=1)
@@ -135,6 +209,8 @@ def main():
     print(f"Top-3 Accuracy : {top3:.3f}")
     print("\n== Classification report ==")
     print(classification_report(y_te, y_pred, zero_division=0, target_names=le.classes_))
+    STAGE_TIMES["evaluate"] = time.perf_counter() - eval_t0
+    print(f"[TIME] {'evaluate':<12} {STAGE_TIMES['evaluate']:.2f}s")
 
     # 保存bundle save bundle
     bundle = {
@@ -143,9 +219,22 @@ def main():
         "feature_cols": feature_names,
         "disease_classes": list(le.classes_),
     }
-    joblib.dump(bundle, MODEL_PATH)
+    with stage("save"):
+        joblib.dump(bundle, MODEL_PATH)
     print(f"\n[INFO] Saved RF model bundle to: {MODEL_PATH.resolve()}")
+    if export_npz:
+        with stage("export_npz"):
+            npz_path = export_bundle(bundle, MODEL_PATH.with_suffix(".npz"), source_path=MODEL_PATH)
+        print(f"[INFO] Saved flat forest to: {npz_path.resolve()}")
+    print(f"[TIME] {'total':<12} {sum(STAGE_TIMES.values()):.2f}s")
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore")
-    main()
+    parser = argparse.ArgumentParser(description="Train the RF disease model.")
+    parser.add_argument("--search", choices=["grid", "halving"], default="grid",
+                        help="Exhaustive GridSearchCV or successive halving over tree count")
+    parser.add_argument("--cache-dir", type=str, default=str(CACHE_DIR))
+    parser.add_argument("--no-cache", action="store_true", help="Always re-run preprocessing and splitting")
+    parser.add_argument("--export-npz", action="store_true", help="Also write the flat .npz forest (forest_npz.py)")
+    args = parser.parse_args()
+    main(search=args.search, cache_dir=None if args.no_cache else args.cache_dir, export_npz=args.export_npz)
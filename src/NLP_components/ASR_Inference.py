@@ -8,17 +8,32 @@ Usage (CLI):
 Programmatic use:
     from mms_transcribe import transcribe
     text = transcribe("/path/to/audio.wav")
+
+Concurrent transcribe() calls are micro-batched by a background worker
+(ASR_BATCHING=0 disables it; tune with ASR_MAX_BATCH / ASR_MAX_WAIT_MS / ASR_MAX_QUEUE).
 """
 
 import argparse
+import os
+import queue
 import sys
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import List, Optional
 
+import soundfile as sf
 import torch
 import torchaudio
 
 from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
 
+try:
+    from NLP_components import onnx_backend, quantize
+except ImportError:  # run as a script from src/NLP_components
+    import onnx_backend, quantize
+
 # --------------------
 # Config
 # --------------------
@@ -32,6 +47,27 @@ elif getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
 else:
     DEVICE = "cpu"
 
+# Micro-batching: concurrent transcribe() calls are grouped into one padded forward pass.
+# A batch is flushed when it reaches ASR_MAX_BATCH items or ASR_MAX_WAIT_MS after its first item.
+BATCHING = os.environ.get("ASR_BATCHING", "1") != "0"
+MAX_BATCH = int(os.environ.get("ASR_MAX_BATCH", "8"))
+MAX_WAIT_MS = float(os.environ.get("ASR_MAX_WAIT_MS", "25"))
+MAX_QUEUE = int(os.environ.get("ASR_MAX_QUEUE", "64"))
+QUEUE_TIMEOUT_S = float(os.environ.get("ASR_QUEUE_TIMEOUT_S", "5"))
+
+# Streaming mode: long recordings are read and decoded in windows of ASR_CHUNK_S seconds,
+# each carrying ASR_STRIDE_S seconds of overlap on either side that is discarded after decoding.
+CHUNK_S = float(os.environ.get("ASR_CHUNK_S", "20"))
+STRIDE_S = float(os.environ.get("ASR_STRIDE_S", "4"))
+
+# ASR_BACKEND=onnx: run the exported graph on ONNX Runtime CPU (see export_onnx.py)
+BACKEND = onnx_backend.backend("ASR_BACKEND")
+if BACKEND == "onnx":
+    DEVICE = "cpu"  # ORT CPU sessions take CPU tensors
+
+# ASR_QUANTIZE=1: dynamic int8 Linear layers on CPU (cached under QUANT_CACHE_DIR)
+QUANTIZE = quantize.enabled("ASR_QUANTIZE") and DEVICE == "cpu"
+
 # Lazy singletons (loaded on first call)
 _MODEL: Optional[Wav2Vec2ForCTC] = None
 _PROCESSOR: Optional[Wav2Vec2Processor] = None
@@ -45,6 +81,12 @@ def _ensure_loaded():
     global _MODEL, _PROCESSOR
     if _MODEL is None or _PROCESSOR is None:
         _PROCESSOR = Wav2Vec2Processor.from_pretrained(BASE_ID)
+        if BACKEND == "onnx":
+            _MODEL = onnx_backend.OnnxCTCModel()
+            return
+        if QUANTIZE:
+            _MODEL = quantize.load_quantized(Wav2Vec2ForCTC, BASE_ID)
+            return
         # Use float16 on CUDA to save memory; float32 elsewhere
         torch_dtype = torch.float16 if DEVICE == "cuda" else torch.float32
         _MODEL = Wav2Vec2ForCTC.from_pretrained(BASE_ID, torch_dtype=torch_dtype)
@@ -52,18 +94,55 @@ def _ensure_loaded():
         _MODEL.eval()
 
 
+@lru_cache(maxsize=16)
+def _get_resampler(orig_sr: int, target_sr: int) -> torchaudio.transforms.Resample:
+    """Build the sinc resampling kernel once per (orig_sr, target_sr) pair and reuse it."""
+    return torchaudio.transforms.Resample(orig_freq=orig_sr, new_freq=target_sr)
+
+
+def _load_wav_fast(audio_path: str, target_sr: int) -> Optional[torch.Tensor]:
+    """
+    Fast path for files that are already mono PCM WAV at target_sr: soundfile reads the
+    samples straight into a float32 buffer that the tensor shares (no [C, T] tensor,
+    no downmix, no resample). Returns None when the file needs the general path.
+    """
+    if not isinstance(audio_path, (str, os.PathLike)):
+        return None
+    try:
+        meta = sf.info(audio_path)
+    except Exception:
+        return None
+    if meta.format != "WAV" or meta.channels != 1 or meta.samplerate != target_sr:
+        return None
+    data, _ = sf.read(audio_path, dtype="float32", always_2d=False)
+    return torch.from_numpy(data)
+
+
+def load():
+    """Public warm-up hook: load the model/processor now instead of on the first request."""
+    _ensure_loaded()
+
+
 def load_audio(audio_path: str, target_sr: int = 16000) -> torch.Tensor:
     """
     Load an audio file and return a mono waveform tensor at target_sr (shape: [T]).
     """
+    fast = _load_wav_fast(audio_path, target_sr)
+    if fast is not None:
+        return fast
+
     waveform, sample_rate = torchaudio.load(audio_path)  # [C, T]
+    return _to_mono(waveform, sample_rate, target_sr)
+
+
+def _to_mono(waveform: torch.Tensor, sample_rate: int, target_sr: int = 16000) -> torch.Tensor:
+    """Downmix a [C, T] waveform and resample it to target_sr; returns shape [T]."""
     # Convert to mono (mean across channels) if needed
     if waveform.dim() == 2 and waveform.size(0) > 1:
         waveform = waveform.mean(dim=0, keepdim=True)
-    # Resample if necessary
+    # Resample if necessary (kernel cached per rate pair)
     if sample_rate != target_sr:
-        resampler = torchaudio.transforms.Resample(orig_freq=sample_rate, new_freq=target_sr)
-        waveform = resampler(waveform)
+        waveform = _get_resampler(sample_rate, target_sr)(waveform)
     # Squeeze to [T]
     return waveform.squeeze(0)
 
@@ -72,39 +151,200 @@ def load_audio(audio_path: str, target_sr: int = 16000) -> torch.Tensor:
 # Core API
 # --------------------
 @torch.inference_mode()
-def transcribe(audio_path: str) -> str:
+def transcribe_batch(waveforms: List[torch.Tensor]) -> List[str]:
     """
-    Transcribe a single audio file to text using the base MMS-1B model.
-
-    Args:
-        audio_path: Path to an audio file readable by torchaudio (e.g., .wav, .flac).
+    Transcribe several 16 kHz mono waveforms ([T] tensors) in one forward pass.
 
-    Returns:
-        The decoded transcription string (greedy CTC), with '|' replaced by spaces.
+    Waveforms are right-padded to the longest one; the attention mask keeps the
+    padding out of the encoder, and each output is trimmed to its own frame count
+    before greedy CTC decoding.
     """
-    _ensure_loaded()
+    pred_ids, frame_lens = _forward(waveforms)
+    texts = []
+    for ids, n in zip(pred_ids, frame_lens):
+        texts.append(_decode(ids[:n]))
+    return texts
 
-    # Load & preprocess audio
-    wav_16k = load_audio(audio_path, target_sr=16000)
+
+def _forward(waveforms: List[torch.Tensor]):
+    """Run the model on padded waveforms; return greedy ids [B, T] and the valid frame count per item."""
+    _ensure_loaded()
 
     # MMS expects 16k PCM in the processor
     # (Use the feature extractor part; tokenizer is not used for inputs.)
     fe = _PROCESSOR.feature_extractor(
-        wav_16k.numpy(), sampling_rate=16000, return_tensors="pt", padding=False
+        [w.numpy() for w in waveforms], sampling_rate=16000, return_tensors="pt",
+        padding=True, return_attention_mask=True
     )
 
     inputs = {"input_values": fe["input_values"].to(DEVICE)}
-    if "attention_mask" in fe:
-        inputs["attention_mask"] = fe["attention_mask"].to(DEVICE)
+    inputs["attention_mask"] = fe["attention_mask"].to(DEVICE)
 
     # Forward pass
     logits = _MODEL(**inputs).logits  # [B, T, V]
 
-    # Greedy decode (CTC)
-    pred_ids = torch.argmax(logits, dim=-1)  # [B, T]
+    # Greedy decode (CTC), ignoring frames that only cover padding
+    pred_ids = torch.argmax(logits, dim=-1).cpu()  # [B, T]
+    frame_lens = _MODEL._get_feat_extract_output_lengths(fe["attention_mask"].sum(-1)).tolist()
+    return pred_ids, [int(n) for n in frame_lens]
+
+
+def _decode(ids: torch.Tensor) -> str:
     # batch_decode returns a list[str]; replace '|' with spaces for readability
-    text = _PROCESSOR.batch_decode(pred_ids)[0].replace("|", " ").strip()
-    return text
+    return _PROCESSOR.batch_decode(ids.unsqueeze(0))[0].replace("|", " ").strip()
+
+
+class _BatchScheduler:
+    """
+    Background worker that drains a bounded queue of waveforms, groups them into
+    batches of up to max_batch (waiting at most max_wait_ms for stragglers) and
+    resolves each caller's Future with its transcript, or with its greedy CTC ids
+    (trimmed to its own frame count) for raw=True submissions from transcribe_stream().
+    All model forwards go through this one thread while batching is on.
+    """
+
+    def __init__(self, max_batch: int, max_wait_ms: float, max_queue: int):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="asr-batcher", daemon=True)
+                    self._thread.start()
+
+    def submit(self, waveform: torch.Tensor, raw: bool = False):
+        """Queue one waveform and block until its transcript (or CTC ids if raw) is ready."""
+        self._ensure_started()
+        fut = Future()
+        try:
+            self._queue.put((waveform, raw, fut), timeout=QUEUE_TIMEOUT_S)
+        except queue.Full:
+            raise RuntimeError("ASR queue is full, try again shortly.")
+        return fut.result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                with torch.inference_mode():
+                    pred_ids, frame_lens = _forward([w for w, _, _ in batch])
+                    outs = [ids[:n] if raw else _decode(ids[:n])
+                            for (_, raw, _), ids, n in zip(batch, pred_ids, frame_lens)]
+            except Exception as e:
+                for _, _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, _, fut), out in zip(batch, outs):
+                fut.set_result(out)
+
+
+_SCHEDULER = _BatchScheduler(MAX_BATCH, MAX_WAIT_MS, MAX_QUEUE)
+
+
+def transcribe(audio_path: str) -> str:
+    """
+    Transcribe a single audio file to text using the base MMS-1B model.
+
+    Args:
+        audio_path: Path to an audio file readable by torchaudio (e.g., .wav, .flac).
+
+    Returns:
+        The decoded transcription string (greedy CTC), with '|' replaced by spaces.
+    """
+    # Load & preprocess audio
+    wav_16k = load_audio(audio_path, target_sr=16000)
+    return transcribe_waveform(wav_16k)
+
+
+def transcribe_waveform(wav_16k: torch.Tensor) -> str:
+    """Transcribe an already-decoded 16 kHz mono waveform ([T] float tensor)."""
+    if BATCHING:
+        return _SCHEDULER.submit(wav_16k)
+    return transcribe_batch([wav_16k])[0]
+
+
+def _window_ids(wav_16k: torch.Tensor) -> torch.Tensor:
+    """Greedy CTC ids for one window, through the batch scheduler when batching is on."""
+    if BATCHING:
+        return _SCHEDULER.submit(wav_16k, raw=True)
+    pred_ids, frame_lens = _forward([wav_16k])
+    return pred_ids[0, :frame_lens[0]]
+
+
+def _iter_windows(audio_path: str, chunk_s: float, stride_s: float, target_sr: int = 16000):
+    """
+    Read audio one window at a time. Yields (waveform [T] at target_sr, left, right),
+    where left/right are the overlap lengths (in target_sr samples) to discard after decoding.
+    """
+    meta = torchaudio.info(audio_path)
+    sr, total = meta.sample_rate, meta.num_frames
+    step = int((chunk_s - 2 * stride_s) * sr)
+    stride = int(stride_s * sr)
+    if step <= 0:
+        raise ValueError("chunk_s must be larger than 2 * stride_s")
+
+    start = 0
+    while start < total:
+        w_start = max(0, start - stride)
+        w_end = min(total, start + step + stride)
+        waveform, _ = torchaudio.load(audio_path, frame_offset=w_start, num_frames=w_end - w_start)
+        left = start - w_start
+        right = w_end - min(total, start + step)
+        scale = target_sr / sr
+        yield _to_mono(waveform, sr, target_sr), int(left * scale), int(right * scale)
+        start += step
+
+
+@torch.inference_mode()
+def transcribe_stream(audio_path: str, chunk_s: float = CHUNK_S, stride_s: float = STRIDE_S):
+    """
+    Transcribe a long recording window by window, yielding (delta, text) after each window:
+    text is the full transcript so far (authoritative), delta the text appended since the
+    previous yield, or None when re-decoding changed earlier words and the caller should
+    replace what it shows with text. Only one window is held in memory at a time.
+
+    CTC ids from the overlap regions are dropped and the kept ids are appended to a
+    running sequence, so repeats/blanks that straddle a boundary collapse exactly as
+    in a single forward pass. Window forwards share the micro-batch scheduler with
+    transcribe_waveform(), so streaming and batched requests never run the model concurrently.
+    """
+    all_ids = []
+    prev_text = ""
+    for wav, left, right in _iter_windows(audio_path, chunk_s, stride_s):
+        if wav.numel() == 0:
+            continue
+        ids = _window_ids(wav)
+        n = len(ids)
+        ratio = n / wav.numel()  # model frames per input sample
+        lo = int(round(left * ratio))
+        hi = n - int(round(right * ratio))
+        all_ids.extend(ids[lo:hi].tolist())
+
+        text = _decode(torch.tensor(all_ids, dtype=torch.long))
+        if text == prev_text:
+            continue
+        # None: the decoder re-segmented earlier words, so the text so far was replaced
+        delta = text[len(prev_text):] if text.startswith(prev_text) else None
+        prev_text = text
+        yield delta, text
 
 
 # --------------------
@@ -113,11 +353,17 @@ def transcribe(audio_path: str) -> str:
 def main():
     parser = argparse.ArgumentParser(description="Transcribe audio with base MMS-1B (no adapters).")
     parser.add_argument("audio_path", type=str, help="Path to audio file (e.g., *.wav, *.flac)")
+    parser.add_argument("--stream", action="store_true", help="Decode in overlapping windows and print as it goes")
     args = parser.parse_args()
 
     try:
-        text = transcribe(args.audio_path)
-        print(text)
+        if args.stream:
+            for delta, text in transcribe_stream(args.audio_path):
+                print(("\n" + text) if delta is None else delta, end="", flush=True)
+            print()
+        else:
+            text = transcribe(args.audio_path)
+            print(text)
     except FileNotFoundError:
         print(f"Error: file not found at {args.audio_path}", file=sys.stderr)
         sys.exit(1)
@@ -1,23 +1,25 @@
 # src/NLP_components/MT_Inference.py
-# PURPOSE: Load mT5 once and expose translate(), with HF token baked in.
+# PURPOSE: Load mT5 once (lazily, on first use) and expose translate(), with HF token baked in.
 
 import os
+import re
+import threading
 import torch
 from transformers import MT5ForConditionalGeneration, T5TokenizerFast
 from huggingface_hub import login
 
+try:
+    from NLP_components import onnx_backend, quantize
+    from NLP_components.mt_cache import TranslationCache
+except ImportError:  # run as a script from src/NLP_components
+    import onnx_backend, quantize
+    from mt_cache import TranslationCache
+
 # ----------------- HARD-CODED CREDENTIALS (PRIVATE ONLY) -----------------
 HF_TOKEN = ""  # <-- put your token here
 REPO_ID  = "Widewingz/MT_model1"                           # <-- your model repo
 # -------------------------------------------------------------------------
 
-# Optional: don’t write token to git credentials on the machine
-try:
-    login(token=HF_TOKEN, add_to_git_credential=False)
-except Exception:
-    # Not fatal; if login fails, Transformers may still use cached auth
-    pass
-
 # Device & dtype
 device = (
     "mps" if torch.backends.mps.is_available()
@@ -25,26 +27,158 @@ device = (
 )
 dtype = torch.float16 if device == "cuda" else None
 
-# Load model & tokenizer once at import time
-print(f"[MT_Inference] Loading '{REPO_ID}' on device={device} ...")
-_tok = T5TokenizerFast.from_pretrained(REPO_ID)  # token now provided by login()
-_model = MT5ForConditionalGeneration.from_pretrained(REPO_ID, torch_dtype=dtype).to(device).eval()
-print("[MT_Inference] Loaded.")
+# MT_BACKEND=onnx: encoder/decoder-with-past on ONNX Runtime CPU (see export_onnx.py)
+BACKEND = onnx_backend.backend("MT_BACKEND")
+if BACKEND == "onnx":
+    device = "cpu"  # ORT CPU sessions take CPU tensors
+
+# MT_QUANTIZE=1: dynamic int8 Linear layers on CPU (cached under QUANT_CACHE_DIR)
+QUANTIZE = quantize.enabled("MT_QUANTIZE") and device == "cpu"
+
+# Repeated phrases skip generate(): MT_CACHE_SIZE entries, MT_CACHE_TTL_S seconds (0 = no expiry),
+# MT_CACHE_DB=/path/to/cache.sqlite to persist across restarts
+CACHE = TranslationCache(
+    max_size=int(os.environ.get("MT_CACHE_SIZE", "2048")),
+    ttl_s=float(os.environ.get("MT_CACHE_TTL_S", "86400")),
+    db_path=os.environ.get("MT_CACHE_DB", ""),
+)
+
+# translate_batch(): sentences are grouped by token length (MT_BUCKET_WIDTH tokens per bucket)
+# and each bucket is decoded in padded batches of at most MT_MAX_BATCH prompts
+BUCKET_WIDTH = int(os.environ.get("MT_BUCKET_WIDTH", "16"))
+MAX_BATCH = int(os.environ.get("MT_MAX_BATCH", "16"))
+PREFIX = "translate Warlpiri to English: "
+
+# Named decoding profiles. max_new_tokens scales with the prompt length (in tokens) so short
+# inputs stop early instead of running to max_len; max_len still caps the output.
+#   fast     - greedy with KV cache, for interactive triage turns
+#   balanced - small beam, stops once all beams finish
+#   quality  - the original 6-beam search, for final summaries
+PROFILES = {
+    "fast":     {"num_beams": 1, "do_sample": False, "use_cache": True, "new_tokens_per_input": 1.5, "min_new_tokens": 8},
+    "balanced": {"num_beams": 3, "early_stopping": True, "use_cache": True, "new_tokens_per_input": 2.0, "min_new_tokens": 16},
+    "quality":  {"num_beams": 6, "early_stopping": True, "use_cache": True},
+}
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Lazy singletons (loaded on first translate() or an explicit load())
+_tok = None
+_model = None
+_lock = threading.Lock()
 
-def translate(text: str, beams: int = 6, max_len: int = 160, len_pen: float = 1.0) -> str:
-    prompt = "translate Warlpiri to English: " + text.strip()
-    enc = _tok([prompt], return_tensors="pt").to(device)
+def load():
+    """Log in (only if a token is set) and load model & tokenizer exactly once."""
+    global _tok, _model
+    if _model is not None:
+        return
+    with _lock:
+        if _model is not None:
+            return
+        # Optional: don’t write token to git credentials on the machine
+        if HF_TOKEN:
+            try:
+                login(token=HF_TOKEN, add_to_git_credential=False)
+            except Exception:
+                # Not fatal; if login fails, Transformers may still use cached auth
+                pass
+
+        print(f"[MT_Inference] Loading '{REPO_ID}' on device={device} ...")
+        _tok = T5TokenizerFast.from_pretrained(REPO_ID)  # token now provided by login()
+        if BACKEND == "onnx":
+            _model = onnx_backend.load_mt()
+        elif QUANTIZE:
+            _model = quantize.load_quantized(MT5ForConditionalGeneration, REPO_ID)
+        else:
+            _model = MT5ForConditionalGeneration.from_pretrained(REPO_ID, torch_dtype=dtype).to(device).eval()
+        print("[MT_Inference] Loaded.")
+
+def translate(text: str, beams: int = 6, max_len: int = 160, len_pen: float = 1.0, profile: str = None) -> str:
+    key = CACHE.make_key(text, beams, max_len, len_pen, profile)
+    cached = CACHE.get(key)
+    if cached is not None:
+        return cached
+    out = _generate(text, beams=beams, max_len=max_len, len_pen=len_pen, profile=profile)
+    CACHE.put(key, out)
+    return out
+
+def _generate(text: str, beams: int, max_len: int, len_pen: float, profile: str = None) -> str:
+    return _generate_many([text], beams=beams, max_len=max_len, len_pen=len_pen, profile=profile)[0]
+
+def _generation_kwargs(profile: str, input_len: int, beams: int, max_len: int, len_pen: float) -> dict:
+    """generate() kwargs: the explicit beams/max_len/len_pen, or a named profile."""
+    if not profile:
+        return {"num_beams": beams, "max_length": max_len, "length_penalty": len_pen}
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from {sorted(PROFILES)}")
+    kw = dict(PROFILES[profile])
+    per_input = kw.pop("new_tokens_per_input", None)
+    min_new = kw.pop("min_new_tokens", 0)
+    if per_input is not None:
+        kw["max_new_tokens"] = min(max_len, max(min_new, int(input_len * per_input)))
+    else:
+        kw["max_length"] = max_len
+    if kw["num_beams"] > 1:
+        kw["length_penalty"] = len_pen
+    return kw
+
+def _generate_many(texts: list, beams: int, max_len: int, len_pen: float, profile: str = None) -> list:
+    """One padded generate() call for several prompts."""
+    load()
+    prompts = [PREFIX + t.strip() for t in texts]
+    enc = _tok(prompts, return_tensors="pt", padding=True).to(device)
+    # Length of the source text itself (without the task prefix) drives max_new_tokens
+    input_len = int(enc["attention_mask"].sum(-1).max()) - len(_tok(PREFIX, add_special_tokens=False)["input_ids"])
+    kw = _generation_kwargs(profile, input_len, beams, max_len, len_pen)
     with torch.no_grad():
-        out = _model.generate(
-            **enc,
-            num_beams=beams,
-            max_length=max_len,
-            length_penalty=len_pen
-        )
-    return _tok.batch_decode(out, skip_special_tokens=True)[0].strip()
+        out = _model.generate(**enc, **kw)
+    return [t.strip() for t in _tok.batch_decode(out, skip_special_tokens=True)]
+
+def split_sentences(text: str) -> list:
+    parts = [p.strip() for p in _SENT_SPLIT_RE.split(text or "") if p and p.strip()]
+    return parts or [(text or "").strip()]
+
+def translate_batch(texts: list, beams: int = 6, max_len: int = 160, len_pen: float = 1.0, profile: str = None) -> list:
+    """
+    Translate several texts at once. Each text is split into sentences; uncached sentences
+    are bucketed by token length so each padded generate() only pads to similar lengths,
+    then the translations are re-joined per text in the original order.
+    """
+    sents_per_text = [split_sentences(t) for t in texts]
+
+    # Cache lookups; unique misses only
+    done, todo = {}, []
+    for sents in sents_per_text:
+        for s in sents:
+            if s in done or s in todo:
+                continue
+            hit = CACHE.get(CACHE.make_key(s, beams, max_len, len_pen, profile)) if s else ""
+            if hit is not None:
+                done[s] = hit
+            else:
+                todo.append(s)
+
+    if todo:
+        load()
+        lengths = [len(ids) for ids in _tok([PREFIX + s for s in todo])["input_ids"]]
+        buckets = {}
+        for s, n in zip(todo, lengths):
+            buckets.setdefault(n // BUCKET_WIDTH, []).append(s)
+        for _, group in sorted(buckets.items()):
+            for i in range(0, len(group), MAX_BATCH):
+                chunk = group[i:i + MAX_BATCH]
+                outs = _generate_many(chunk, beams=beams, max_len=max_len, len_pen=len_pen, profile=profile)
+                for s, out in zip(chunk, outs):
+                    done[s] = out
+                    CACHE.put(CACHE.make_key(s, beams, max_len, len_pen, profile), out)
+
+    return [" ".join(done[s] for s in sents if done[s]) for sents in sents_per_text]
 
 def info() -> dict:
-    return {"device": device, "repo": REPO_ID}
+    return {
+        "device": device, "backend": BACKEND, "repo": REPO_ID,
+        "quantized": QUANTIZE, "profiles": sorted(PROFILES),
+        "loaded": _model is not None, "cache": CACHE.stats(),
+    }
 
 if __name__ == "__main__":
     print(info())
@@ -2,50 +2,79 @@
 # pip install -U spacy negspacy dateparser regex spacy-lookups-data
 # python -m spacy download en_core_web_sm
 
-import os, sys, csv, re, json
+import os, sys, csv, re, json, hashlib, pickle, copy, threading, tempfile
 import regex as rxx
 import dateparser
 import spacy
-from spacy.matcher import PhraseMatcher
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 from datetime import datetime
 
 # ---------- Robust spaCy loader (auto fallback) ----------
 from dataclasses import dataclass
 
+try:
+    from NLP_components.term_index import TermIndex
+except ImportError:  # run as a script from src/NLP_components
+    from term_index import TermIndex
+
 @dataclass
 class NlpCtx:
     nlp: any
-    symptom_matcher: any
-    disease_matcher: any
+    matcher: any
 
 def bootstrap_pipeline() -> NlpCtx:
     # Wrap already-initialized globals into a context
     return NlpCtx(
         nlp=nlp,
-        symptom_matcher=symptom_matcher,
-        disease_matcher=disease_matcher
+        matcher=lexicon_matcher
     )
-def get_nlp():
+# Pipeline profile (NLP_PROFILE). The rules only need tokens, lemmas for negation triggers
+# and sentence boundaries, so the tagger/parser are dropped unless asked for:
+#   fast  : en_core_web_sm tokenizer + lookup-table lemmatizer + sentencizer (default)
+#   full  : en_core_web_sm minus NER (tagger, parser, rule lemmatizer)
+#   blank : spacy.blank("en") + lookup lemmatizer + sentencizer (no model download)
+# Compare latency/accuracy with: python nlp_bench.py
+SPACY_MODEL = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+NLP_PROFILES = ("fast", "full", "blank")
+NLP_PROFILE = os.environ.get("NLP_PROFILE", "fast").lower()
+
+def _add_lookup_lemmas(nlp):
+    # table lemmas (spacy-lookups-data) need no POS tags; without the tables the negation
+    # check still sees the raw token text
+    try:
+        nlp.add_pipe("lemmatizer", config={"mode": "lookup"}).initialize()
+    except Exception as e:
+        print(f"[nlp] lookup lemmatizer unavailable ({e}); negation falls back to token text")
+        if "lemmatizer" in nlp.pipe_names:
+            nlp.remove_pipe("lemmatizer")
+    if "sentencizer" not in nlp.pipe_names:
+        nlp.add_pipe("sentencizer")
+    return nlp
+
+def _load_model(profile):
+    if profile == "full":
+        return spacy.load(SPACY_MODEL, disable=["ner"])
+    nlp = spacy.load(SPACY_MODEL, exclude=["tok2vec", "tagger", "parser", "senter",
+                                           "attribute_ruler", "lemmatizer", "ner"])
+    return _add_lookup_lemmas(nlp)
+
+def get_nlp(profile: str = NLP_PROFILE):
+    if profile not in NLP_PROFILES:
+        raise ValueError(f"NLP_PROFILE must be one of {NLP_PROFILES}, got '{profile}'")
+    if profile == "blank":
+        return _add_lookup_lemmas(spacy.blank("en"))
     try:
-        return spacy.load("en_core_web_sm", disable=["ner"])
+        return _load_model(profile)
     except Exception:
         try:
-            import spacy.cli
-            spacy.cli.download("en_core_web_sm")
-            return spacy.load("en_core_web_sm", disable=["ner"])
+            from spacy.cli import download
+            download(SPACY_MODEL)
+            return _load_model(profile)
         except Exception:
-            nlp = spacy.blank("en")
-            try:
-                nlp.add_pipe("lemmatizer", config={"mode": "rule"})
-            except Exception:
-                pass
-            if "sentencizer" not in nlp.pipe_names:
-                nlp.add_pipe("sentencizer")
-            return nlp
+            return _add_lookup_lemmas(spacy.blank("en"))
 
 nlp = get_nlp()
-print("spaCy pipeline:", nlp.pipe_names)
+print(f"spaCy pipeline ({NLP_PROFILE}):", nlp.pipe_names)
 
 # ---------- Locate CSV path ----------
 # ---------- Locate data files & load dictionaries with priority ----------
@@ -55,7 +84,7 @@ DICT_CSV        = os.path.join(BASE_DIR, "dictionary.csv")       # preferred
 WIDE_CSV        = os.path.join(BASE_DIR, "cleaned_wide.csv")     # optional wide matrix
 
 # CLI for uploaded CSV 
-csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TWO_COL
+csv_path = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith("-") else DEFAULT_TWO_COL
 
 def normalize_term(s: str) -> str:
     s = (s or "").strip().lower()
@@ -139,58 +168,26 @@ def load_terms_prefer_dictionary():
                     symptom_terms.add(s)
     return symptom_terms, disease_terms, os.path.basename(csv_path)
 
-# ---- actually load dictionaries ----
-symptom_terms, disease_terms, source_used = load_terms_prefer_dictionary()
-print(f"Loaded dictionary from {source_used} → diseases: {len(disease_terms)}, symptoms: {len(symptom_terms)}")
-
-# ---- optional seeds (keep as supplement) ----
-seed_symptoms = {
-    "chest pain", "shortness of breath", "fever", "mild fever",
-    "headache", "cough", "sore throat", "back pain", "lower back pain",
-    "nausea", "vomiting", "diarrhea", "runny nose", "wheezing", "chest tightness"
-}
-seed_diseases = {"flu", "pneumonia", "asthma", "hypertension", "diabetes", "covid-19", "common cold"}
-
-symptom_terms |= {s.lower() for s in seed_symptoms}
-disease_terms |= {d.lower() for d in seed_diseases}
-
-# filter trivial
-STOP_LIKE = {"and","or","the","a","an","with","of","in","to","on"}
-symptom_terms = {t for t in symptom_terms if t not in STOP_LIKE and len(t) > 2}
-disease_terms = {t for t in disease_terms if t not in STOP_LIKE and len(t) > 2}
-
-
-
-## additional hardcoded seed terms (fix bug disease output empty)
-# ---- Fallback seed terms so tests work even with a tiny CSV ----
+# ========== 3) Term tables ==========
+# ---- seed terms (supplement, so tests work even with a tiny CSV) ----
 seed_symptoms = {
     "chest pain", "shortness of breath", "fever", "mild fever",
     "headache", "cough", "sore throat", "back pain", "lower back pain",
     "nausea", "vomiting", "diarrhea", "runny nose", "wheezing", "chest tightness"
 }
-
-#temp 
 seed_diseases = {"flu", "pneumonia", "asthma", "hypertension", "diabetes", "covid-19", "common cold"}
 
-
-symptom_terms |= {s.lower() for s in seed_symptoms}
-disease_terms |= {d.lower() for d in seed_diseases}
-
 # remove too short/common words
-stop_like = {"and","or","the","a","an","with","of","in","to","on"}
-symptom_terms = {t for t in symptom_terms if t not in stop_like and len(t) > 2}
-disease_terms = {t for t in disease_terms if t not in stop_like and len(t) > 2}
-
-# ========== 3) PhraseMatcher ==========
-symptom_matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
-disease_matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
-
-symptom_patterns = [nlp.make_doc(t) for t in sorted(symptom_terms)]
-disease_patterns = [nlp.make_doc(t) for t in sorted(disease_terms)]
+STOP_LIKE = {"and","or","the","a","an","with","of","in","to","on"}
 
-#avoid OOM,limit to 5000 patterns
-symptom_matcher.add("SYMPTOM", symptom_patterns[:5000])
-disease_matcher.add("DISEASE", disease_patterns[:5000])
+def build_term_tables():
+    """Dictionary terms + seeds, minus trivial ones: (symptom_terms, disease_terms, source_used)."""
+    symptom_terms, disease_terms, source_used = load_terms_prefer_dictionary()
+    symptom_terms |= seed_symptoms
+    disease_terms |= seed_diseases
+    symptom_terms = {t for t in symptom_terms if t not in STOP_LIKE and len(t) > 2}
+    disease_terms = {t for t in disease_terms if t not in STOP_LIKE and len(t) > 2}
+    return symptom_terms, disease_terms, source_used
 
 # ========== 4)  Rules: Denial, Severity, Duration, Body, Vital Signs ==========
 NEG_TRIGGERS = {"no","not","without","deny","denies","denied","never","none"}
@@ -212,8 +209,114 @@ TIME_WORDS = {"today","yesterday","tonight","this morning","this afternoon","las
 
 RISK_KEYWORDS = {"smoker","pregnant","diabetic","asthma","hypertensive"}
 
+# ---- one labelled matcher for every lexicon, built once ----
+# A sentence is tokenized once and scanned once; each match carries its lexicon label.
+SYMPTOM, DISEASE, BODY_SITE, TIME, RISK, SEVERITY = "SYMPTOM", "DISEASE", "BODY_SITE", "TIME", "RISK", "SEVERITY"
+LEXICONS = {
+    BODY_SITE: BODY_SITES,
+    TIME: TIME_WORDS,
+    RISK: RISK_KEYWORDS,
+    SEVERITY: set(SEVERITY_WORDS),
+}
+
+# ---- lexicon artifact: term tables + term index, rebuilt only when a source changes ----
+# Build explicitly with `python entext_train.py --build-lexicon`; otherwise it is
+# (re)built and written on first import whenever the key no longer matches.
+LEXICON_VERSION = 1
+LEXICON_ARTIFACT = os.environ.get("LEXICON_ARTIFACT", os.path.join(BASE_DIR, "lexicon.bin"))
+
+def lexicon_source_path() -> str:
+    # same priority as load_terms_prefer_dictionary()
+    for path in (DICT_CSV, WIDE_CSV):
+        if os.path.exists(path):
+            return path
+    return csv_path
+
+def lexicon_key() -> str:
+    """sha256 over the source CSV bytes, the in-code term sets and the tokenizer they were built with."""
+    model = f"{nlp.lang}_{nlp.meta.get('name')}-{nlp.meta.get('version')}"
+    h = hashlib.sha256(f"v{LEXICON_VERSION}|spacy {spacy.__version__}|{model}".encode())
+    src = lexicon_source_path()
+    if os.path.exists(src):
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    code_terms = (seed_symptoms, seed_diseases, STOP_LIKE, *LEXICONS.values())
+    h.update(repr([sorted(t) for t in code_terms]).encode())
+    return h.hexdigest()
+
+def build_lexicon(key: str) -> dict:
+    symptom_terms, disease_terms, source_used = build_term_tables()
+    index = TermIndex(nlp.vocab)
+    # streamed through the tokenizer into the term index; no pattern Docs are kept
+    index.add(SYMPTOM, nlp.tokenizer.pipe(sorted(symptom_terms)))
+    index.add(DISEASE, nlp.tokenizer.pipe(sorted(disease_terms)))
+    for label, terms in LEXICONS.items():
+        index.add(label, nlp.tokenizer.pipe(sorted(terms)))
+    return {
+        "version": LEXICON_VERSION,
+        "key": key,
+        "source": source_used,
+        "symptom_terms": symptom_terms,
+        "disease_terms": disease_terms,
+        "index": index.to_bytes(),
+    }
+
+def save_lexicon(lexicon: dict, path: str = LEXICON_ARTIFACT):
+    # private temp file per writer, then an atomic rename: workers rebuilding at the same
+    # time never share a temp file, and readers never see a half-written artifact
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(lexicon, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+def load_lexicon(path: str = LEXICON_ARTIFACT, rebuild: bool = False) -> dict:
+    key = lexicon_key()
+    if not rebuild and os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                lexicon = pickle.load(f)
+            if lexicon.get("version") == LEXICON_VERSION and lexicon.get("key") == key:
+                return lexicon
+        except Exception as e:
+            print(f"[lexicon] ignoring unreadable artifact {path}: {e}")
+    lexicon = build_lexicon(key)
+    try:
+        save_lexicon(lexicon, path)
+    except OSError as e:
+        print(f"[lexicon] could not write {path}: {e}")
+    return lexicon
+
+# ---- actually load dictionaries ----
+_lexicon = load_lexicon()
+symptom_terms, disease_terms, source_used = _lexicon["symptom_terms"], _lexicon["disease_terms"], _lexicon["source"]
+lexicon_matcher = TermIndex.from_bytes(nlp.vocab, _lexicon["index"])
+print(f"Loaded dictionary from {source_used} → diseases: {len(disease_terms)}, symptoms: {len(symptom_terms)}")
+
+
+def scan_lexicons(doc):
+    """
+    Run the combined matcher once and return typed spans:
+      {label: [(start, end, text), ...]}  (deduplicated, in match order)
+    """
+    spans = defaultdict(list)
+    seen = set()
+    for match_id, start, end in lexicon_matcher(doc):
+        label = nlp.vocab.strings[match_id]
+        text = doc[start:end].text
+        key = (label, start, end, text.lower())
+        if key not in seen:
+            seen.add(key)
+            spans[label].append((start, end, text))
+    return spans
+
 # Vital Signs/Values: Body Temperature, Heart Rate, Blood Pressure, Blood Glucose, Blood Oxygen Saturation
-TEMP_RE = re.compile(r"(?:temp(?:erature)?\s*[:=]?\s*)?(\d{2}\.\d|\d{2})(?:\s*°?\s*[cf])", re.I)
+# the unit letter must end a word, so "100 cough" is not read as 100 °C
+TEMP_RE = re.compile(r"(?:temp(?:erature)?\s*[:=]?\s*)?(\d{2}\.\d|\d{2})(?:\s*°?\s*[cf]\b)", re.I)
 HR_RE   = re.compile(r"(?:hr|heart\s*rate)\s*[:=]?\s*(\d{2,3})", re.I)
 BP_RE   = re.compile(r"(?:bp|blood\s*pressure)\s*[:=]?\s*(\d{2,3})\s*/\s*(\d{2,3})", re.I)
 SPO2_RE = re.compile(r"(?:spo2|o2\s*saturation|oxygen)\s*[:=]?\s*(\d{2,3})\s*%", re.I)
@@ -287,17 +390,25 @@ def window_has_negation(doc, start_i, end_i=None, win=6):
         t = doc[i].text.lower()
         if t in NEG_BOUNDARIES:
             break
-        if doc[i].lemma_.lower() in NEG_TRIGGERS:
+        if t in NEG_TRIGGERS or doc[i].lemma_.lower() in NEG_TRIGGERS:
             return True
     return False
 
 
-def pick_severity(text):
+_SCAN = object()
+
+def pick_severity(text, keywords=_SCAN):
+    """
+    keywords: severity words already found by scan_lexicons() (lowercased). When omitted,
+    the text is scanned for them here (substring match).
+    """
     t = text.lower()
 
-    # Explicit keywords
+    # Explicit keywords (dict order decides when several are present)
+    if keywords is _SCAN:
+        keywords = {k for k in SEVERITY_WORDS if k in t}
     for k, v in SEVERITY_WORDS.items():
-        if k in t:
+        if k in keywords:
             return v
 
     # Numeric pain scale
@@ -379,8 +490,10 @@ def keep_longest_strings(strings):
 
 
 # ========== 5) Main extraction function ==========
-def extract_features(sentence: str):
-    doc = nlp(sentence)
+def extract_features(sentence: str, doc=None):
+    # doc may be passed in when the caller already ran nlp.pipe() over a batch
+    if doc is None:
+        doc = nlp(sentence)
     low = sentence.lower()
 
     out = {
@@ -405,8 +518,14 @@ def extract_features(sentence: str):
     if m := SPO2_RE.search(sentence): out["vitals"]["spo2"] = int(m.group(1))
     if m := GLU_RE.search(sentence):  out["vitals"]["glucose"] = int(m.group(1))
 
+    # ---- every lexicon in one pass over the tokens ----
+    spans = scan_lexicons(doc)
+
+    def lowered(label):
+        return {" ".join(tok.lower_ for tok in doc[s:e]) for s, e, _ in spans[label]}
+
     # ---- severity ----
-    out["severity"] = pick_severity(sentence)
+    out["severity"] = pick_severity(sentence, keywords=lowered(SEVERITY))
 
     # ---- duration (normalized) ----
     out["duration"] = []
@@ -420,44 +539,29 @@ def extract_features(sentence: str):
     elif "gradual" in low or "slowly" in low: out["onset"] = "gradual"
 
     # ---- temporal anchors (no 'for'/'since' alone) ----
-    out["temporal"] = []
-    for tw in TIME_WORDS:
-        if re.search(rf"\b{re.escape(tw)}\b", low):
-            out["temporal"].append(tw)
-    out["temporal"] = sorted(set(out["temporal"]))
+    out["temporal"] = sorted(lowered(TIME))
 
     # ---- risk factors ----
-    out["risk_factors"] = sorted({rk for rk in RISK_KEYWORDS if rk in low})
+    out["risk_factors"] = sorted(lowered(RISK))
 
     # ---- dictionary matches + one-sided negation ----
-    sym_matches = symptom_matcher(doc)
-    dis_matches = disease_matcher(doc)
-
-    def spans_to_strings(matches):
-        spans = []
-        for _id, start, end in matches:
-            span = doc[start:end]
-            spans.append((span.start, span.end, span.text))
-        uniq, seen = [], set()
-        for s, e, t in spans:
-            key = (s, e, t.lower())
-            if key not in seen:
-                seen.add(key); uniq.append((s, e, t))
-        return uniq
+    positive_spans = []
 
     # symptoms
-    for s, e, t in spans_to_strings(sym_matches):
+    for s, e, t in spans[SYMPTOM]:
         if window_has_negation(doc, s, e, win=4):
             out["negated"].append(t)
         else:
             out["symptoms"].append(t)
+            positive_spans.append((s, e))
 
     # diseases
-    for s, e, t in spans_to_strings(dis_matches):
+    for s, e, t in spans[DISEASE]:
         if window_has_negation(doc, s, e, win=4):
             out["negated"].append(t)
         else:
             out["diseases"].append(t)
+            positive_spans.append((s, e))
 
     # ---- normalize + keep longest ----
     out["symptoms"] = keep_longest_strings([normalize_term(x) for x in out["symptoms"]])
@@ -472,18 +576,12 @@ def extract_features(sentence: str):
 
 
     # ---- body sites from NON-negated mentions (plus cautious scan) ----
-    body_sites_found = set()
-
-    def site_from_text(txt):
-        tl = txt.lower()
-        for site in BODY_SITES:
-            if re.search(rf"\b{re.escape(site)}\b", tl):
-                body_sites_found.add(site)
-
-    for s_txt in out["symptoms"]:
-        site_from_text(s_txt)
-    for d_txt in out["diseases"]:
-        site_from_text(d_txt)
+    # body-site spans that sit inside a positive symptom/disease span
+    body_sites_found = {
+        " ".join(tok.lower_ for tok in doc[bs:be])
+        for bs, be, _ in spans[BODY_SITE]
+        if any(ps <= bs and be <= pe for ps, pe in positive_spans)
+    }
 
 
     
@@ -654,16 +752,125 @@ def combine_features(out):
 # Public helper functions
 # ===========================
 
+# ---- per-sentence result cache ----
+# The ASR -> NLP flow re-submits the same or lightly edited transcript, so results are
+# memoized per sentence and only new/changed sentences go through spaCy and the rules.
+SENT_CACHE_SIZE = int(os.environ.get("NLP_SENT_CACHE_SIZE", "4096"))  # 0 disables
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+class SentenceCache:
+    """LRU of normalized sentence -> final JSON from combine_features()."""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._mem.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: dict):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._mem[key] = value
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_size:
+                self._mem.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._mem),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+SENT_CACHE = SentenceCache(SENT_CACHE_SIZE)
+
+def normalize_sentence(text: str) -> str:
+    return re.sub(r"\s+", " ", text or "").strip()
+
+def split_sentences(text: str) -> list:
+    parts = [normalize_sentence(p) for p in _SENT_SPLIT_RE.split(text or "")]
+    return [p for p in parts if p]
+
+def cache_stats() -> dict:
+    return SENT_CACHE.stats()
+
+def combine_sentences(sentences, batch_size: int = 256) -> list:
+    """
+    Final JSON for each (normalized) sentence, in order. Cached sentences are served from
+    SENT_CACHE; the distinct misses go through nlp.pipe in one batch and are cached.
+    """
+    outputs, misses = {}, []
+    for s in sentences:
+        if s in outputs:
+            continue
+        outputs[s] = SENT_CACHE.get(s)
+        if outputs[s] is None:
+            misses.append(s)
+    for s, doc in zip(misses, nlp.pipe(misses, batch_size=batch_size)):
+        outputs[s] = combine_features(extract_features(s, doc=doc))
+        SENT_CACHE.put(s, outputs[s])
+    return [outputs[s] for s in sentences]
+
+_TRIAGE_RANK = {"mild": 0, "moderate": 1, "severe": 2}
+
+def merge_combined(results: list, text: str = "") -> dict:
+    """
+    Merge per-sentence combine_features() outputs into one result of the same shape:
+      symptoms     : union by name, keeping the longest duration_days any sentence gave it
+      vitals       : first value of each vital across sentences
+      triage_level : the highest level, or "severe" if a red-flag pair spans sentences of text
+    """
+    durations, vitals, triage = {}, {}, "mild"
+    for r in results:
+        for sym in r.get("symptoms", []):
+            d = sym.get("duration_days")
+            prev = durations.get(sym["name"])
+            durations[sym["name"]] = d if prev is None or (d is not None and d > prev) else prev
+        for k, v in r.get("vitals", {}).items():
+            vitals.setdefault(k, v)
+        if _TRIAGE_RANK.get(r.get("triage_level"), 0) > _TRIAGE_RANK[triage]:
+            triage = r["triage_level"]
+    if any(_has_pair(text, a, b) for a, b in RED_FLAG_PAIRS):
+        triage = "severe"
+
+    merged = {"vitals": vitals, "triage_level": triage}
+    if durations:
+        merged = {"symptoms": [{"name": k, "duration_days": durations[k]} for k in sorted(durations)], **merged}
+    return merged
+
 def extract_and_combine(text: str) -> dict:
     """
-    Process a single sentence:
-    1) run rule-based NLP extraction (extract_features)
-    2) post-process to the final minimal JSON (combine_features)
-    Returns the final JSON dict.
+    Process a text of one or more sentences:
+    1) split it into sentences; each is looked up in SENT_CACHE, and only the misses run
+       rule-based NLP extraction (extract_features) and post-processing (combine_features)
+    2) merge the per-sentence results (merge_combined)
+    Editing one sentence of a transcript therefore recomputes only that sentence.
+    Returns a fresh dict; cached entries are never handed out.
     """
-    feats = extract_features(text)
-    final = combine_features(feats)
-    return final
+    sentences = split_sentences(text)
+    results = combine_sentences(sentences)
+    if len(results) == 1:
+        return copy.deepcopy(results[0])  # callers may mutate; the cached copy must not change
+    return merge_combined(results, text)
 
 # Process multiple texts and
 def extract_symptom_names(data):
@@ -677,31 +884,69 @@ def extract_symptom_names(data):
     return names
 def process_texts(texts):
     """
-    Process a list of sentences and return list of results:
-    [
-      {"input_text": <str>, "output": <final_json>},
-      ...
-    ]
+    Process a list of texts and return the flat list of positive symptom names
+    (in input order, one entry per mention). Each text is split into sentences, and
+    only sentences missing from SENT_CACHE are recomputed.
     """
-    results = []
-    for t in texts:
-        if not t or not str(t).strip():
-            continue
-        out = extract_and_combine(t)
-        results.append({"out":out})
-        symptoms = extract_symptom_names(results)
-    return symptoms
+    sentences = [s for t in texts if t for s in split_sentences(str(t))]
+    results = [{"out": out} for out in combine_sentences(sentences)]
+    return extract_symptom_names(results)
 
 
+TEST_SENTENCES = [
+    "I have severe chest pain and shortness of breath for 3 days, temp 39C.",
+    "No fever but mild headache since yesterday.",
+    "Patient denies cough or sore throat. HR 120, BP 160/100.",
+    "I am a 38-year-old female, sudden lower back pain tonight.",
+    "I think it's just flu, not pneumonia."
+]
+
+
+def iter_lines(input_path: str, encoding: str = "utf-8"):
+    """Yield non-empty, stripped lines one at a time (the file is never held in memory)."""
+    with open(input_path, "r", encoding=encoding) as f:
+        for ln in f:
+            ln = ln.strip()
+            if ln:
+                yield ln
+
+
+def iter_results(texts, batch_size: int = 256, n_process: int = 1, include_features: bool = False):
+    """
+    Stream results for an iterable of sentences:
+      {"line": <n>, "input_text": <str>, "output": <final_json>[, "features": <raw extract_features>]}
+
+    Tokenization/tagging goes through nlp.pipe in batches (n_process > 1 forks spaCy workers);
+    matching and rules run here on the returned Docs. Nothing is accumulated, so memory
+    stays flat however many lines are fed in.
+    """
+    numbered = ((str(t).strip(), i) for i, t in enumerate(texts, 1) if t and str(t).strip())
+    docs = nlp.pipe(numbered, batch_size=batch_size, n_process=n_process, as_tuples=True)
+    for doc, i in docs:
+        feats = extract_features(doc.text, doc=doc)
+        item = {"line": i, "input_text": doc.text, "output": combine_features(feats)}
+        if include_features:
+            item["features"] = feats
+        yield item
+
 
 def process_file(input_path: str, encoding: str = "utf-8"):
     """
     Read a plain text file (one sentence per line),
     run processing, and return list of results (same format as process_texts).
     """
-    with open(input_path, "r", encoding=encoding) as f:
-        lines = [ln.strip() for ln in f if ln.strip()]
-    return process_texts(lines)
+    return process_texts(iter_lines(input_path, encoding=encoding))
+
+
+def process_file_ndjson(input_path: str, output_path: str, encoding: str = "utf-8",
+                        batch_size: int = 256, n_process: int = 1, include_features: bool = False) -> int:
+    """
+    Stream a large transcript file through the pipeline and write one full result per line
+    to output_path as it goes. Returns the number of lines written.
+    """
+    items = iter_results(iter_lines(input_path, encoding=encoding), batch_size=batch_size,
+                         n_process=n_process, include_features=include_features)
+    return save_ndjson(items, output_path)
 
 
 def save_json(obj, output_path: str, ensure_ascii: bool = False):
@@ -714,12 +959,15 @@ def save_json(obj, output_path: str, ensure_ascii: bool = False):
 
 def save_ndjson(items, output_path: str, ensure_ascii: bool = False):
     """
-    Save a list of dicts as NDJSON (one JSON per line).
-    Useful for streaming / large outputs.
+    Save an iterable of dicts as NDJSON (one JSON per line), writing each item as it arrives,
+    so a generator can be streamed straight to disk. Returns the number of lines written.
     """
+    n = 0
     with open(output_path, "w", encoding="utf-8") as f:
         for it in items:
             f.write(json.dumps(it, ensure_ascii=ensure_ascii) + "\n")
+            n += 1
+    return n
 
 
 # ======== demo / tests ========
@@ -729,13 +977,27 @@ def save_ndjson(items, output_path: str, ensure_ascii: bool = False):
 # Entry point for file input
 # ===========================
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rule-based symptom extraction.")
+    parser.add_argument("--input", help="Text file, one sentence per line")
+    parser.add_argument("--output", help="NDJSON output path (streamed)")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--n-process", type=int, default=1)
+    parser.add_argument("--features", action="store_true", help="Include raw extract_features() output")
+    parser.add_argument("--build-lexicon", action="store_true", help=f"Rebuild {LEXICON_ARTIFACT} and exit")
+    args, _ = parser.parse_known_args()
+
+    if args.build_lexicon:
+        lex = load_lexicon(rebuild=True)
+        print(f"Wrote {LEXICON_ARTIFACT} (key {lex['key'][:12]}, source {lex['source']})")
+        sys.exit(0)
+
+    if args.input and args.output:
+        n = process_file_ndjson(args.input, args.output, batch_size=args.batch_size,
+                                n_process=args.n_process, include_features=args.features)
+        print(f"Wrote {n} results to {args.output}")
+        sys.exit(0)
 
-    tests = [
-        "I have severe chest pain and shortness of breath for 3 days, temp 39C.",
-        "No fever but mild headache since yesterday.",
-        "Patient denies cough or sore throat. HR 120, BP 160/100.",
-        "I am a 38-year-old female, sudden lower back pain tonight.",
-        "I think it's just flu, not pneumonia."
-    ]
     print("\n=== Test cases ===")
-    print(process_texts(tests))
\ No newline at end of file
+    print(process_texts(TEST_SENTENCES))
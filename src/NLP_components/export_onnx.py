@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+export_onnx.py — Export the ASR (MMS-1B CTC) and MT (mT5) models to ONNX for onnx_backend.
+
+Usage (CLI):
+    python export_onnx.py --asr --mt [--out ./onnx] [--opset 17]
+
+Writes:
+    <out>/asr/model.onnx (+ external weight data) and config.json
+    <out>/mt/  encoder_model.onnx, decoder_model.onnx, decoder_with_past_model.onnx, tokenizer/config files
+"""
+
+import argparse
+import os
+
+import torch
+
+from onnx_backend import ONNX_DIR
+
+
+def export_asr(out_dir: str, opset: int):
+    from transformers import Wav2Vec2ForCTC
+    from ASR_Inference import BASE_ID
+
+    os.makedirs(out_dir, exist_ok=True)
+    model = Wav2Vec2ForCTC.from_pretrained(BASE_ID, torch_dtype=torch.float32).eval()
+    model.config.save_pretrained(out_dir)
+
+    # One second of dummy audio; batch and sample axes are dynamic
+    dummy = torch.zeros(1, 16000)
+    mask = torch.ones(1, 16000, dtype=torch.long)
+    path = os.path.join(out_dir, "model.onnx")
+    print(f"[export] ASR -> {path}")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (dummy, mask),
+            path,
+            input_names=["input_values", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_values": {0: "batch", 1: "samples"},
+                "attention_mask": {0: "batch", 1: "samples"},
+                "logits": {0: "batch", 1: "frames"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+
+def export_mt(out_dir: str):
+    # optimum exports encoder, decoder and decoder-with-past (KV cache) graphs in one go
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    from transformers import T5TokenizerFast
+    from MT_Inference import REPO_ID
+
+    print(f"[export] MT -> {out_dir}")
+    model = ORTModelForSeq2SeqLM.from_pretrained(REPO_ID, export=True, use_cache=True)
+    model.save_pretrained(out_dir)
+    T5TokenizerFast.from_pretrained(REPO_ID).save_pretrained(out_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export ASR / MT models to ONNX.")
+    parser.add_argument("--asr", action="store_true", help="Export Wav2Vec2ForCTC")
+    parser.add_argument("--mt", action="store_true", help="Export mT5 encoder/decoder(-with-past)")
+    parser.add_argument("--out", type=str, default=ONNX_DIR, help="Output root directory")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    if not (args.asr or args.mt):
+        parser.error("give --asr and/or --mt")
+    if args.asr:
+        export_asr(os.path.join(args.out, "asr"), args.opset)
+    if args.mt:
+        export_mt(os.path.join(args.out, "mt"))
+
+
+if __name__ == "__main__":
+    main()
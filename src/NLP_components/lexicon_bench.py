@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+lexicon_bench.py — Build time, memory and match throughput of TermIndex vs spaCy's PhraseMatcher.
+
+Usage (CLI):
+    python lexicon_bench.py [--n-terms 100000] [--sentences notes.txt] [--repeat 20] [--out bench.json]
+
+The dictionary terms from entext_train are padded with synthetic multi-word terms up to
+--n-terms, so the cost of larger clinical vocabularies can be measured without shipping one.
+Memory is the traced Python allocation retained by the built index (tracemalloc).
+pipeline_share is the matcher's time per sentence as a fraction of the full per-sentence
+path (nlp.pipe + extract_features with the installed lexicon), i.e. what matching costs
+end to end.
+"""
+
+import argparse
+import json
+import random
+import time
+import tracemalloc
+
+from spacy.matcher import PhraseMatcher
+
+import entext_train as et
+from term_index import TermIndex
+
+SAMPLE_SENTENCES = [
+    "I have severe chest pain and shortness of breath for 3 days, temp 39C.",
+    "No fever but mild headache since yesterday.",
+    "Patient denies cough or sore throat. HR 120, BP 160/100.",
+    "I am a 38-year-old female, sudden lower back pain tonight.",
+    "Vomiting and yellowing of eyes, spo2 92%, glucose 180, this morning",
+    "I have zika virus and wheezing, temperature 101F",
+]
+
+
+def make_terms(n_terms: int):
+    terms = sorted(et.symptom_terms | et.disease_terms)
+    words = sorted({w for t in terms for w in t.split()})
+    rng = random.Random(0)
+    seen = set(terms)
+    while len(terms) < n_terms:
+        t = " ".join(rng.choice(words) for _ in range(rng.randint(2, 4)))
+        if t not in seen:
+            seen.add(t)
+            terms.append(t)
+    return terms
+
+
+def build_phrase_matcher(terms):
+    matcher = PhraseMatcher(et.nlp.vocab, attr="LOWER")
+    matcher.add("TERM", [et.nlp.make_doc(t) for t in terms])
+    return matcher
+
+
+def build_term_index(terms):
+    index = TermIndex(et.nlp.vocab)
+    index.add("TERM", et.nlp.tokenizer.pipe(terms))
+    return index
+
+
+def bench(name, build, terms, docs):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    matcher = build(terms)
+    build_s = time.perf_counter() - t0
+    mem_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    n_matches = sum(len(matcher(d)) for d in docs)
+    match_s = time.perf_counter() - t0
+    return {
+        "matcher": name,
+        "n_terms": len(terms),
+        "build_s": round(build_s, 3),
+        "memory_mb": round(mem_mb, 2),
+        "docs_per_s": round(len(docs) / match_s, 1) if match_s else None,
+        "matches": n_matches,
+    }
+
+
+def pipeline_docs_per_s(sentences, repeat: int) -> float:
+    """Sentences/s through nlp.pipe + extract_features, as in combine_sentences()."""
+    texts = sentences * max(1, repeat // 10)
+    t0 = time.perf_counter()
+    for text, doc in zip(texts, et.nlp.pipe(texts, batch_size=256)):
+        et.extract_features(text, doc)
+    return len(texts) / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TermIndex against PhraseMatcher.")
+    parser.add_argument("--n-terms", type=int, default=100_000, help="Pad the dictionary up to this many terms")
+    parser.add_argument("--sentences", type=str, help="Text file, one sentence per line (default: built-in samples)")
+    parser.add_argument("--repeat", type=int, default=200, help="Times the sentence set is matched")
+    parser.add_argument("--out", type=str, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    sentences = SAMPLE_SENTENCES
+    if args.sentences:
+        sentences = [ln for ln in et.iter_lines(args.sentences)]
+    docs = list(et.nlp.tokenizer.pipe(sentences)) * args.repeat
+    terms = make_terms(args.n_terms)
+
+    rows = [
+        bench("PhraseMatcher", build_phrase_matcher, terms, docs),
+        bench("TermIndex", build_term_index, terms, docs),
+    ]
+    pipeline = pipeline_docs_per_s(sentences, args.repeat)
+    for r in rows:
+        r["pipeline_share"] = round(pipeline / r["docs_per_s"], 3) if r["docs_per_s"] else None
+        print(json.dumps(r))
+    print(json.dumps({"pipeline_docs_per_s": round(pipeline, 1)}))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
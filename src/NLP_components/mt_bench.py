@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+mt_bench.py — Latency vs quality of the mT5 decoding profiles on a held-out Warlpiri set.
+
+Usage (CLI):
+    python mt_bench.py heldout.tsv [--profiles fast,balanced,quality] [--runs 3] [--out bench.json]
+
+    heldout.tsv : "<warlpiri>\t<english reference>" per line
+
+Quality is reported as character error rate and word-level F1 against the reference;
+the translation cache is bypassed so every run pays for decoding.
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+
+import MT_Inference as mt
+from quant_report import cer
+
+
+def word_f1(hyp: str, ref: str) -> float:
+    h, r = Counter(hyp.lower().split()), Counter(ref.lower().split())
+    overlap = sum((h & r).values())
+    if not overlap:
+        return 0.0
+    p, rc = overlap / sum(h.values()), overlap / sum(r.values())
+    return 2 * p * rc / (p + rc)
+
+
+def load_pairs(path):
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for ln in f:
+            parts = ln.rstrip("\n").split("\t")
+            if len(parts) >= 2 and parts[0].strip():
+                pairs.append((parts[0].strip(), parts[1].strip()))
+    return pairs
+
+
+def bench_profile(profile, pairs, runs):
+    outs, times = [], []
+    for src, _ in pairs:
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            out = mt._generate(src, beams=6, max_len=160, len_pen=1.0, profile=profile)
+            times.append((time.perf_counter() - t0) * 1000)
+        outs.append(out)
+    refs = [r for _, r in pairs]
+    return {
+        "profile": profile,
+        "n": len(pairs),
+        "latency_ms_mean": round(statistics.mean(times), 1),
+        "latency_ms_p50": round(statistics.median(times), 1),
+        "latency_ms_p95": round(sorted(times)[int(0.95 * (len(times) - 1))], 1),
+        "cer": round(statistics.mean(cer(o, r) for o, r in zip(outs, refs)), 4),
+        "word_f1": round(statistics.mean(word_f1(o, r) for o, r in zip(outs, refs)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark mT5 decoding profiles.")
+    parser.add_argument("heldout", type=str, help="TSV of Warlpiri sentences and English references")
+    parser.add_argument("--profiles", type=str, default=",".join(mt.PROFILES))
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per sentence")
+    parser.add_argument("--out", type=str, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.heldout)
+    if not pairs:
+        parser.error(f"no '<src>\\t<ref>' lines in {args.heldout}")
+
+    mt.load()
+    mt._generate(pairs[0][0], beams=1, max_len=16, len_pen=1.0)  # warm-up, not timed
+
+    rows = [bench_profile(p.strip(), pairs, args.runs) for p in args.profiles.split(",") if p.strip()]
+    for r in rows:
+        print(json.dumps(r))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
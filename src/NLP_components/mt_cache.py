@@ -0,0 +1,127 @@
+# src/NLP_components/mt_cache.py
+# PURPOSE: Bounded LRU/TTL cache for translations, optionally persisted to SQLite across restarts.
+
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+# Bump when the key format changes, so entries persisted under the old format are never hit
+KEY_VERSION = 2
+
+
+def normalize_text(text: str) -> str:
+    """
+    Unicode-NFC and collapse whitespace so trivially different inputs share a key.
+    Case is kept: the model translates the raw text, and casing changes its output
+    (proper nouns, acronyms).
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TranslationCache:
+    """
+    key = (KEY_VERSION, normalized text, beams, max_len, len_pen, decoding profile)
+
+    In-memory entries are evicted least-recently-used beyond max_size and ignored once
+    older than ttl_s. If db_path is set, entries are also written to SQLite and a memory
+    miss falls back to the database, so warm entries survive a restart. The table is pruned
+    on open and every max_size // 10 puts: expired rows are deleted and only the newest
+    max_size rows are kept.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_s: float = 86400, db_path: str = ""):
+        self.max_size = max_size
+        self.ttl_s = ttl_s
+        self._mem = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.disk_hits = 0
+        self._prune_every = max(1, max_size // 10)
+        self._puts_since_prune = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_created ON translations (created_at)")
+            self._prune_db()
+            self._db.commit()
+
+    @staticmethod
+    def make_key(text: str, beams: int, max_len: int, len_pen: float, profile: str = None) -> str:
+        return f"v{KEY_VERSION}\x1f{normalize_text(text)}\x1f{beams}\x1f{max_len}\x1f{len_pen}\x1f{profile or ''}"
+
+    def _fresh(self, created_at: float) -> bool:
+        return self.ttl_s <= 0 or (time.time() - created_at) < self.ttl_s
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None and self._fresh(item[1]):
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            if item is not None:
+                del self._mem[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+                if row and self._fresh(row[1]):
+                    self._put_mem(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def _prune_db(self):
+        """Delete rows older than ttl_s, then all but the newest max_size rows (caller commits)."""
+        if self.ttl_s > 0:
+            self._db.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_s,))
+        self._db.execute(
+            "DELETE FROM translations WHERE key NOT IN "
+            "(SELECT key FROM translations ORDER BY created_at DESC LIMIT ?)",
+            (self.max_size,),
+        )
+        self._puts_since_prune = 0
+
+    def _put_mem(self, key, value, created_at):
+        self._mem[key] = (value, created_at)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_size:
+            self._mem.popitem(last=False)
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._put_mem(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now),
+                )
+                self._puts_since_prune += 1
+                if self._puts_since_prune >= self._prune_every:
+                    self._prune_db()
+                self._db.commit()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._mem),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "persistent": self._db is not None,
+        }
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+nlp_bench.py — Per-sentence latency and accuracy of the spaCy pipeline profiles (NLP_PROFILE).
+
+Usage (CLI):
+    python nlp_bench.py [--profiles full,fast,blank] [--sentences notes.txt] [--runs 50] [--out bench.json]
+
+Accuracy is agreement with the first profile that loads from the list (normally "full"):
+the share of sentences whose final JSON is identical, and F1 over extracted symptom names.
+The sentence cache is bypassed, so every run pays for the pipeline and the rules.
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import entext_train as et
+
+
+def symptom_names(out):
+    return {s["name"] for s in out.get("symptoms", [])}
+
+
+def f1(hyp: set, ref: set) -> float:
+    if not hyp and not ref:
+        return 1.0
+    overlap = len(hyp & ref)
+    if not overlap:
+        return 0.0
+    p, r = overlap / len(hyp), overlap / len(ref)
+    return 2 * p * r / (p + r)
+
+
+def run_profile(profile, sentences, runs):
+    t0 = time.perf_counter()
+    nlp = et.get_nlp(profile)
+    load_ms = (time.perf_counter() - t0) * 1000
+    list(nlp.pipe(sentences))  # warm-up, not timed
+
+    nlp_ms, total_ms, outputs = [], [], []
+    for _ in range(runs):
+        outputs = []
+        for s in sentences:
+            t0 = time.perf_counter()
+            doc = nlp(s)
+            t1 = time.perf_counter()
+            outputs.append(et.combine_features(et.extract_features(s, doc=doc)))
+            t2 = time.perf_counter()
+            nlp_ms.append((t1 - t0) * 1000)
+            total_ms.append((t2 - t0) * 1000)
+    row = {
+        "profile": profile,
+        "pipe_names": nlp.pipe_names,
+        "load_ms": round(load_ms, 1),
+        "nlp_ms_mean": round(statistics.mean(nlp_ms), 3),
+        "sentence_ms_mean": round(statistics.mean(total_ms), 3),
+        "sentence_ms_p95": round(sorted(total_ms)[int(0.95 * (len(total_ms) - 1))], 3),
+    }
+    return row, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spaCy pipeline profiles.")
+    parser.add_argument("--profiles", type=str, default="full,fast,blank")
+    parser.add_argument("--sentences", type=str, help="Text file, one sentence per line (default: built-in tests)")
+    parser.add_argument("--runs", type=int, default=50, help="Timed passes over the sentences")
+    parser.add_argument("--out", type=str, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    sentences = list(et.iter_lines(args.sentences)) if args.sentences else et.TEST_SENTENCES
+    rows, reference = [], None
+    for profile in (p.strip() for p in args.profiles.split(",") if p.strip()):
+        row, outputs = run_profile(profile, sentences, args.runs)
+        if reference is None:
+            reference = (profile, outputs)
+        ref_profile, ref_outputs = reference
+        row["reference"] = ref_profile
+        row["exact_match"] = round(sum(o == r for o, r in zip(outputs, ref_outputs)) / len(sentences), 4)
+        row["symptom_f1"] = round(statistics.mean(
+            f1(symptom_names(o), symptom_names(r)) for o, r in zip(outputs, ref_outputs)), 4)
+        rows.append(row)
+        print(json.dumps(row))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
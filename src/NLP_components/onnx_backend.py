@@ -0,0 +1,88 @@
+# src/NLP_components/onnx_backend.py
+# PURPOSE: ONNX Runtime (CPU) drop-ins for the eager ASR / MT models, selected with ASR_BACKEND / MT_BACKEND.
+#
+# Export the graphs first:  python export_onnx.py --asr --mt
+# then run with e.g.        ASR_BACKEND=onnx MT_BACKEND=onnx ORT_THREADS=4 python app.py
+
+import os
+from types import SimpleNamespace
+
+import torch
+
+ONNX_DIR = os.environ.get(
+    "ONNX_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx"),
+)
+ASR_ONNX_DIR = os.path.join(ONNX_DIR, "asr")
+MT_ONNX_DIR = os.path.join(ONNX_DIR, "mt")
+# intra-op threads for every session (0 = let ONNX Runtime decide)
+ORT_THREADS = int(os.environ.get("ORT_THREADS", "0"))
+
+
+def backend(env_var: str) -> str:
+    """'torch' (default) or 'onnx'."""
+    name = os.environ.get(env_var, "torch").lower()
+    if name not in ("torch", "onnx"):
+        raise ValueError(f"{env_var} must be 'torch' or 'onnx', got '{name}'")
+    return name
+
+
+def session_options():
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ORT_THREADS:
+        opts.intra_op_num_threads = ORT_THREADS
+    return opts
+
+
+class OnnxCTCModel:
+    """
+    Wav2Vec2ForCTC exported to ONNX, exposing the two things ASR_Inference uses from the
+    eager model: __call__(...).logits and _get_feat_extract_output_lengths().
+    """
+
+    def __init__(self, model_dir: str = ASR_ONNX_DIR):
+        import onnxruntime as ort
+        from transformers import Wav2Vec2Config
+
+        self.config = Wav2Vec2Config.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=session_options(),
+            providers=["CPUExecutionProvider"],
+        )
+
+    def __call__(self, input_values: torch.Tensor, attention_mask: torch.Tensor = None):
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_values, dtype=torch.long)
+        logits = self.session.run(
+            ["logits"],
+            {
+                "input_values": input_values.float().cpu().numpy(),
+                "attention_mask": attention_mask.long().cpu().numpy(),
+            },
+        )[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+    def _get_feat_extract_output_lengths(self, input_lengths: torch.Tensor) -> torch.Tensor:
+        # Same arithmetic as the conv feature encoder: L = floor((L - k) / s) + 1 per layer
+        for k, s in zip(self.config.conv_kernel, self.config.conv_stride):
+            input_lengths = torch.div(input_lengths - k, s, rounding_mode="floor") + 1
+        return input_lengths
+
+
+def load_mt(model_dir: str = MT_ONNX_DIR):
+    """
+    mT5 encoder + decoder-with-past as ONNX Runtime sessions behind the usual generate() API
+    (optimum's ORTModelForSeq2SeqLM), so MT_Inference needs no other changes.
+    """
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    return ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir,
+        use_cache=True,
+        session_options=session_options(),
+        provider="CPUExecutionProvider",
+    )
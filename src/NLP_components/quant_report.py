@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+quant_report.py — Accuracy vs latency of fp32 and dynamic-int8 models on a fixed sample set.
+
+Usage (CLI):
+    python quant_report.py --mt-samples mt_samples.tsv --asr-dir clips/ [--runs 3] [--out report.json]
+
+    mt_samples.tsv : one Warlpiri sentence per line, optionally "<warlpiri>\t<english reference>"
+    clips/         : *.wav files, optionally with a same-name *.txt reference transcript
+
+Without references, int8 outputs are scored against the fp32 outputs (agreement).
+"""
+
+import argparse
+import copy
+import glob
+import io
+import json
+import os
+import statistics
+import time
+
+import torch
+
+from quantize import quantize_linear
+
+
+# --------------------
+# Metrics
+# --------------------
+def edit_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def cer(hyp: str, ref: str) -> float:
+    return edit_distance(hyp, ref) / max(len(ref), 1)
+
+
+def model_mb(model: torch.nn.Module) -> float:
+    """Serialized state_dict size — a good proxy for resident weight memory."""
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 2**20
+
+
+def timed(fn, items, runs):
+    outputs, times = [], []
+    for x in items:
+        for r in range(runs):
+            t0 = time.perf_counter()
+            out = fn(x)
+            times.append((time.perf_counter() - t0) * 1000)
+        outputs.append(out)
+    return outputs, times
+
+
+def summarize(name, model, outputs, times, refs, fp32_outputs=None):
+    row = {
+        "model": name,
+        "size_mb": round(model_mb(model), 1),
+        "latency_ms_mean": round(statistics.mean(times), 1),
+        "latency_ms_p50": round(statistics.median(times), 1),
+    }
+    if any(refs):
+        pairs = [(o, r) for o, r in zip(outputs, refs) if r]
+        row["cer_vs_ref"] = round(statistics.mean(cer(o, r) for o, r in pairs), 4)
+    if fp32_outputs is not None:
+        row["exact_match_vs_fp32"] = round(sum(o == f for o, f in zip(outputs, fp32_outputs)) / len(outputs), 4)
+        row["cer_vs_fp32"] = round(statistics.mean(cer(o, f) for o, f in zip(outputs, fp32_outputs)), 4)
+    return row
+
+
+# --------------------
+# Per-model reports
+# --------------------
+def report_mt(path, runs):
+    from transformers import MT5ForConditionalGeneration, T5TokenizerFast
+    from MT_Inference import REPO_ID
+
+    srcs, refs = [], []
+    with open(path, "r", encoding="utf-8") as f:
+        for ln in f:
+            if ln.strip():
+                parts = ln.rstrip("\n").split("\t")
+                srcs.append(parts[0].strip())
+                refs.append(parts[1].strip() if len(parts) > 1 else "")
+
+    tok = T5TokenizerFast.from_pretrained(REPO_ID)
+    fp32 = MT5ForConditionalGeneration.from_pretrained(REPO_ID, torch_dtype=torch.float32).eval()
+    int8 = quantize_linear(copy.deepcopy(fp32))
+
+    def runner(model):
+        @torch.inference_mode()
+        def run(text):
+            enc = tok(["translate Warlpiri to English: " + text], return_tensors="pt")
+            out = model.generate(**enc, num_beams=6, max_length=160)
+            return tok.batch_decode(out, skip_special_tokens=True)[0].strip()
+        return run
+
+    out32, t32 = timed(runner(fp32), srcs, runs)
+    out8, t8 = timed(runner(int8), srcs, runs)
+    return [summarize("mt5-fp32", fp32, out32, t32, refs),
+            summarize("mt5-int8", int8, out8, t8, refs, fp32_outputs=out32)]
+
+
+def report_asr(audio_dir, runs):
+    from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+    from ASR_Inference import BASE_ID, load_audio
+
+    files = sorted(glob.glob(os.path.join(audio_dir, "*.wav")))
+    waves = [load_audio(p) for p in files]
+    refs = []
+    for p in files:
+        txt = os.path.splitext(p)[0] + ".txt"
+        refs.append(open(txt, encoding="utf-8").read().strip() if os.path.exists(txt) else "")
+
+    proc = Wav2Vec2Processor.from_pretrained(BASE_ID)
+    fp32 = Wav2Vec2ForCTC.from_pretrained(BASE_ID, torch_dtype=torch.float32).eval()
+    int8 = quantize_linear(copy.deepcopy(fp32))
+
+    def runner(model):
+        @torch.inference_mode()
+        def run(wav):
+            fe = proc.feature_extractor(wav.numpy(), sampling_rate=16000, return_tensors="pt")
+            ids = torch.argmax(model(fe["input_values"]).logits, dim=-1)
+            return proc.batch_decode(ids)[0].replace("|", " ").strip()
+        return run
+
+    out32, t32 = timed(runner(fp32), waves, runs)
+    out8, t8 = timed(runner(int8), waves, runs)
+    return [summarize("mms-1b-fp32", fp32, out32, t32, refs),
+            summarize("mms-1b-int8", int8, out8, t8, refs, fp32_outputs=out32)]
+
+
+# --------------------
+# CLI
+# --------------------
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 accuracy/latency report.")
+    parser.add_argument("--mt-samples", type=str, help="TSV of Warlpiri sentences (+ optional references)")
+    parser.add_argument("--asr-dir", type=str, help="Directory of *.wav clips (+ optional *.txt references)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per sample")
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    parser.add_argument("--out", type=str, help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    rows = []
+    if args.mt_samples:
+        rows += report_mt(args.mt_samples, args.runs)
+    if args.asr_dir:
+        rows += report_asr(args.asr_dir, args.runs)
+    if not rows:
+        parser.error("give --mt-samples and/or --asr-dir")
+
+    for r in rows:
+        print(json.dumps(r))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# src/NLP_components/quantize.py
+# PURPOSE: Opt-in dynamic int8 quantization (CPU) for the ASR / MT models, with an on-disk cache.
+
+import os
+import torch
+
+# Where quantized state_dicts are cached (one file per model repo)
+CACHE_DIR = os.environ.get(
+    "QUANT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".quant_cache"),
+)
+
+
+def enabled(env_var: str) -> bool:
+    """True when the given env flag (e.g. ASR_QUANTIZE=1) is set."""
+    return os.environ.get(env_var, "0").lower() in ("1", "true", "yes")
+
+
+def quantize_linear(model: torch.nn.Module) -> torch.nn.Module:
+    """Replace every nn.Linear with a dynamically quantized int8 Linear (weights int8, activations fp32)."""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _cache_path(repo_id: str) -> str:
+    return os.path.join(CACHE_DIR, repo_id.replace("/", "__") + ".int8.pt")
+
+
+def load_quantized(model_cls, repo_id: str, **from_pretrained_kw) -> torch.nn.Module:
+    """
+    Return a CPU int8 model for repo_id.
+
+    First run: load fp32 weights, quantize, save the quantized state_dict.
+    Later runs: build the architecture from config (no fp32 checkpoint read), quantize the
+    empty shell to get the same module structure, then load the cached int8 state_dict.
+    """
+    path = _cache_path(repo_id)
+    if os.path.exists(path):
+        config = model_cls.config_class.from_pretrained(repo_id)
+        model = quantize_linear(model_cls(config).eval())
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+        print(f"[quantize] Loaded cached int8 weights from {path}")
+        return model.eval()
+
+    model = model_cls.from_pretrained(repo_id, torch_dtype=torch.float32, **from_pretrained_kw).eval()
+    model = quantize_linear(model)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    torch.save(model.state_dict(), path)
+    print(f"[quantize] Saved int8 weights to {path}")
+    return model
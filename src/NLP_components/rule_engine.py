@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+rule_engine.py — Columnar version of the vitals / duration / severity / triage rules in entext_train.
+
+Usage (CLI):
+    python rule_engine.py notes.txt [--out signals.csv] [--chunk-size 100000]
+
+    notes.txt : one sentence per line
+
+Instead of running TEMP_RE, HR_RE, BP_RE, SPO2_RE, GLU_RE, DUR_RE and the pain-scale and
+severity scans separately on every sentence, all of them are joined into one alternation
+and applied to a whole batch with pandas str.extractall. Severity and triage are then derived
+from the resulting table with vectorized thresholds, following pick_severity() and
+combine_features().
+
+Differences from the per-sentence path: matches of different rules cannot overlap (the first
+one in the text wins), severity keywords are found on word boundaries, and "fever" as a
+lexicon symptom is only known if the caller passes it (by default only the temperature counts).
+"""
+
+import argparse
+import re
+
+import numpy as np
+import pandas as pd
+
+from entext_train import (
+    TEMP_RE, HR_RE, BP_RE, SPO2_RE, GLU_RE, DUR_RE,
+    SEVERITY_WORDS, RED_FLAG_PAIRS, iter_lines,
+)
+
+PAIN_RE = re.compile(r"pain\s*(\d|10)\s*/\s*10", re.I)
+SEVERITY_RE = re.compile(
+    r"\b(?:" + "|".join(re.escape(k) for k in sorted(SEVERITY_WORDS, key=len, reverse=True)) + r")\b", re.I
+)
+# lower = checked first in pick_severity()
+SEVERITY_PRIORITY = {k: i for i, k in enumerate(SEVERITY_WORDS)}
+SEVERITY_LEVELS = np.array([SEVERITY_WORDS[k] for k in SEVERITY_WORDS], dtype=object)
+
+# (name, pattern); each becomes one named branch of the combined alternation
+RULES = [
+    ("temp", TEMP_RE), ("hr", HR_RE), ("bp", BP_RE), ("spo2", SPO2_RE), ("glucose", GLU_RE),
+    ("dur", DUR_RE), ("pain", PAIN_RE), ("sev", SEVERITY_RE),
+]
+# "3 days", "2w", "since yesterday" -> days, as in normalize_duration()
+_DUR_NUM_RE = re.compile(
+    r"(\d+)\s*(minute|minutes|hour|hours|day|days|week|weeks|month|months|year|years|d|w|m|y)\b", re.I
+)
+_UNIT_DAYS = {
+    "minute": 1/1440, "minutes": 1/1440, "hour": 1/24, "hours": 1/24,
+    "day": 1, "days": 1, "d": 1, "week": 7, "weeks": 7, "w": 7,
+    "month": 30, "months": 30, "m": 30, "year": 365, "years": 365, "y": 365,
+}
+
+
+def _combined():
+    """One alternation over every rule, plus (outer, first inner) column positions per rule."""
+    parts, cols, pos = [], {}, 0
+    for name, rx in RULES:
+        parts.append(f"({rx.pattern})")
+        cols[name] = (pos, pos + 1)
+        pos += 1 + rx.groups
+    return re.compile("|".join(parts), re.I), cols
+
+
+COMBINED_RE, _COLS = _combined()
+
+
+def _col(matches: pd.DataFrame, name: str, inner: int = None) -> pd.Series:
+    outer, first = _COLS[name]
+    return matches.iloc[:, outer if inner is None else first + inner]
+
+
+def _duration_days(spans: pd.Series) -> pd.Series:
+    parts = spans.str.extract(_DUR_NUM_RE)
+    days = pd.to_numeric(parts[0], errors="coerce") * parts[1].str.lower().map(_UNIT_DAYS)
+    low = spans.str.lower()
+    days = days.mask(days.isna() & low.str.contains("since yesterday", regex=False), 1.0)
+    return days.mask(days.isna() & low.str.contains("since today", regex=False), 0.0)
+
+
+def extract_signals(texts) -> pd.DataFrame:
+    """
+    One row per input text with columns:
+      temperature (raw span), temp_value, temp_unit, heart_rate, bp_sys, bp_dia, spo2, glucose,
+      duration_days (max over mentions), pain_scale, severity_kw (highest-priority keyword), red_flag
+    """
+    s = pd.Series(list(texts), dtype="object").fillna("").astype(str)
+    m = s.str.extractall(COMBINED_RE)
+
+    def first(col):
+        return col.dropna().groupby(level=0).first()
+
+    out = pd.DataFrame(index=s.index)
+    out["temperature"] = first(_col(m, "temp"))
+    out["temp_value"] = pd.to_numeric(first(_col(m, "temp", 0)))
+    out["temp_unit"] = out["temperature"].str[-1].str.lower()  # TEMP_RE ends in [cf]
+    out["heart_rate"] = pd.to_numeric(first(_col(m, "hr", 0)))
+    out["bp_sys"] = pd.to_numeric(first(_col(m, "bp", 0)))
+    out["bp_dia"] = pd.to_numeric(first(_col(m, "bp", 1)))
+    out["spo2"] = pd.to_numeric(first(_col(m, "spo2", 0)))
+    out["glucose"] = pd.to_numeric(first(_col(m, "glucose", 0)))
+
+    dur = _col(m, "dur").dropna()
+    out["duration_days"] = _duration_days(dur).groupby(level=0).max()
+    out["pain_scale"] = pd.to_numeric(first(_col(m, "pain", 0)))
+
+    sev = _col(m, "sev").dropna().str.lower().map(SEVERITY_PRIORITY)
+    best = sev.groupby(level=0).min()
+    out["severity_kw"] = pd.Series(SEVERITY_LEVELS[best.to_numpy(dtype=int)], index=best.index)
+
+    low = s.str.lower()
+    red = np.zeros(len(s), dtype=bool)
+    for a, b in RED_FLAG_PAIRS:
+        red |= (low.str.contains(a, regex=False) & low.str.contains(b, regex=False)).to_numpy()
+    out["red_flag"] = red
+    # pick_severity() treats the temperature as Fahrenheit if the sentence contains any 'f'
+    out["_f_in_text"] = low.str.contains("f", regex=False)
+    return out
+
+
+def severity_levels(sig: pd.DataFrame) -> pd.Series:
+    """pick_severity() over a signals table: keyword > pain scale > temperature > red flag > HR > BP."""
+    pain = sig["pain_scale"]
+    temp = sig["temp_value"]
+    temp_c = np.where(sig["_f_in_text"], (temp - 32) * 5 / 9, temp)
+    sys_v, dia_v = sig["bp_sys"], sig["bp_dia"]
+    conds = [
+        sig["severity_kw"].notna(),
+        pain.notna() & (pain <= 3), pain.notna() & (pain <= 6), pain.notna(),
+        temp_c >= 39.0, temp_c >= 38.0,
+        sig["red_flag"],
+        sig["heart_rate"] >= 120,
+        (sys_v >= 180) | (dia_v >= 120), (sys_v >= 160) | (dia_v >= 100),
+    ]
+    choices = [sig["severity_kw"], "mild", "moderate", "severe", "severe", "moderate",
+               "severe", "moderate", "severe", "moderate"]
+    levels = np.select(conds, choices, default=None)
+    return pd.Series(levels, index=sig.index, dtype="object")
+
+
+def triage_levels(sig: pd.DataFrame, severity: pd.Series = None, fever=None) -> pd.Series:
+    """
+    combine_features() triage over a signals table.
+    fever: optional boolean per row for a positive 'fever' symptom found by the lexicon.
+    """
+    if severity is None:
+        severity = severity_levels(sig)
+    temp = sig["temp_value"]
+    temp_c = np.where(sig["temp_unit"] == "f", (temp - 32) * 5 / 9, temp)
+    has_fever = temp_c >= 38.0
+    if fever is not None:
+        has_fever |= np.asarray(fever, dtype=bool)
+
+    sys_v, dia_v = sig["bp_sys"], sig["bp_dia"]
+    crisis = ((sys_v >= 180) | (dia_v >= 120)).to_numpy()
+    marked = ((sys_v >= 160) | (dia_v >= 100)).to_numpy()
+    long_dur = (sig["duration_days"] >= 3).to_numpy()
+
+    triage = np.select(
+        [sig["red_flag"].to_numpy() | crisis, marked | long_dur | has_fever],
+        ["severe", "moderate"],
+        default="mild",
+    ).astype(object)
+    sev = severity.to_numpy()
+    triage[sev == "severe"] = "severe"
+    triage[(sev == "moderate") & (triage == "mild")] = "moderate"
+    return pd.Series(triage, index=sig.index)
+
+
+def score(texts, fever=None) -> pd.DataFrame:
+    """Signals + severity + triage_level for a batch of sentences."""
+    sig = extract_signals(texts)
+    sig["severity"] = severity_levels(sig)
+    sig["triage_level"] = triage_levels(sig, sig["severity"], fever=fever)
+    return sig.drop(columns="_f_in_text")
+
+
+def score_file(input_path: str, output_path: str, chunk_size: int = 100_000) -> int:
+    """Score a one-sentence-per-line file in chunks, appending to a CSV. Returns the row count."""
+    n, chunk = 0, []
+
+    def flush(header):
+        df = score(chunk)
+        df.insert(0, "text", chunk)
+        df.index += n
+        df.to_csv(output_path, mode="w" if header else "a", header=header, index_label="line")
+
+    for ln in iter_lines(input_path):
+        chunk.append(ln)
+        if len(chunk) >= chunk_size:
+            flush(n == 0)
+            n += len(chunk)
+            chunk = []
+    if chunk:
+        flush(n == 0)
+        n += len(chunk)
+    return n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized vitals/duration/severity/triage scoring.")
+    parser.add_argument("input", type=str, help="Text file, one sentence per line")
+    parser.add_argument("--out", type=str, default="signals.csv")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    n = score_file(args.input, args.out, chunk_size=args.chunk_size)
+    print(f"Wrote {n} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# src/NLP_components/term_index.py
+# PURPOSE: Compact phrase index over lower-cased token IDs, used in place of spaCy's PhraseMatcher.
+#
+# PhraseMatcher needs a pattern Doc per term, which is what forced the old 5000-pattern cap.
+# Here each term is kept only as the bytes of its LOWER hash sequence, so the full dictionary
+# (and 100k+ term vocabularies) fit in a few MB. Benchmark: python lexicon_bench.py
+#
+# Trade-off: matching is a Python loop, ~7-10x slower per Doc than the Cython PhraseMatcher
+# (~50-70k vs ~450k docs/s here), in exchange for ~10x less memory at 100k terms. That is
+# 5-7% of a sentence's time through nlp.pipe + extract_features (lexicon_bench's
+# pipeline_share), versus <1% for PhraseMatcher. A dict-of-dicts token trie was measured
+# too: ~2x faster at 100k terms but ~5x the memory of this table, and no faster on the
+# bundled dictionary, where reading the token IDs out of the Doc dominates.
+
+import pickle
+
+from spacy.attrs import LOWER
+
+
+class TermIndex:
+    """
+    terms   : bytes(LOWER ids of the term) -> tuple of label hashes
+    max_len : LOWER id of a first token    -> longest term starting with it
+
+    add(label, docs) takes tokenized terms, e.g. nlp.tokenizer.pipe(terms), and keeps no Docs.
+    Calling the index on a Doc returns [(match_id, start, end), ...] like PhraseMatcher,
+    with match_id resolvable through vocab.strings.
+    """
+
+    def __init__(self, vocab):
+        self.vocab = vocab
+        self._terms = {}
+        self._max_len = {}
+        self._label_sets = {}  # interned label tuples, shared across terms
+
+    def __len__(self):
+        return len(self._terms)
+
+    def add(self, label: str, docs):
+        label_id = self.vocab.strings.add(label)
+        for doc in docs:
+            if not len(doc):
+                continue
+            ids = doc.to_array(LOWER)
+            key = ids.tobytes()
+            labels = self._terms.get(key, ())
+            if label_id not in labels:
+                labels = labels + (label_id,)
+                self._terms[key] = self._label_sets.setdefault(labels, labels)
+            first = int(ids[0])
+            if len(ids) > self._max_len.get(first, 0):
+                self._max_len[first] = len(ids)
+
+    def to_bytes(self) -> bytes:
+        # LOWER and label IDs are string hashes, stable across processes; only label names
+        # need re-registering so match IDs resolve through vocab.strings after loading.
+        label_ids = {label_id for labels in self._label_sets for label_id in labels}
+        return pickle.dumps(
+            {
+                "labels": sorted(self.vocab.strings[i] for i in label_ids),
+                "terms": self._terms,
+                "max_len": self._max_len,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+
+    @classmethod
+    def from_bytes(cls, vocab, data: bytes) -> "TermIndex":
+        state = pickle.loads(data)
+        index = cls(vocab)
+        for name in state["labels"]:
+            vocab.strings.add(name)
+        index._terms = state["terms"]
+        index._max_len = state["max_len"]
+        index._label_sets = {labels: labels for labels in index._terms.values()}
+        return index
+
+    def __call__(self, doc):
+        ids = doc.to_array(LOWER)
+        firsts, buf = ids.tolist(), ids.tobytes()
+        n, width = len(firsts), ids.itemsize
+        get_len, get_term = self._max_len.get, self._terms.get
+        matches = []
+        for start in range(n):
+            longest = get_len(firsts[start])
+            if not longest:
+                continue
+            for end in range(start + 1, min(start + longest, n) + 1):
+                labels = get_term(buf[start * width:end * width])
+                if labels:
+                    matches.extend((label_id, start, end) for label_id in labels)
+        return matches
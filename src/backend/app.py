@@ -2,7 +2,9 @@
 import os, sys, time, tempfile, traceback, io
 from werkzeug.datastructures import FileStorage
 import torch
-from flask import Flask, request, jsonify
+import numpy as np
+from flask import Flask, request, jsonify, Response, stream_with_context
+import json
 from flask_cors import CORS
 import datetime
 import subprocess
@@ -10,19 +12,43 @@ import ffmpeg
 import imageio_ffmpeg
 FFMPEG_BIN = imageio_ffmpeg.get_ffmpeg_exe()  # absolute path to ffmpeg.exe
 
-import torchaudio
 # Ensure we can import src.NLP_components.*
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from NLP_components.MT_Inference import translate as mt_translate, info as mt_info
-from NLP_components.ASR_Inference import transcribe as asr_transcribe
-from NLP_components.entext_train import process_texts, bootstrap_pipeline
-
-from ML.LR import predict
-from ML.precaution import get_precaution
-NLP = bootstrap_pipeline()  # returns an object holding nlp, matchers, dictionaries, etc.
+import importlib
+from backend.lazy import ComponentRegistry
+# Both modules load their models lazily (first call or explicit load())
+from NLP_components import MT_Inference, ASR_Inference
+from NLP_components.MT_Inference import translate as mt_translate, translate_batch as mt_translate_batch, info as mt_info
+from NLP_components.ASR_Inference import (
+    transcribe as asr_transcribe,
+    transcribe_stream as asr_transcribe_stream,
+    transcribe_waveform as asr_transcribe_waveform,
+)
+
+from ML.LR import predict, predict_batch, load_artifacts as lr_load_artifacts
+from ML.precaution import get_precaution, get_index as precaution_index, check_coverage as precaution_coverage
+
+def load_precautions():
+    """Local disease->precautions index; warns at startup if it misses diseases the LR model predicts."""
+    index = precaution_index()
+    _, le, _, _ = lr_load_artifacts()
+    precaution_coverage(le.classes_)
+    return index
+
+# Heavy components are loaded on first use; WARMUP lists the ones to load in background
+# threads at startup (e.g. WARMUP=lr,precautions,nlp,mt,asr). /readyz reports their state.
+COMPONENTS = ComponentRegistry()
+COMPONENTS.add("lr", lr_load_artifacts)        # LR model resident; reloaded only if the .pkl files change
+COMPONENTS.add("precautions", load_precautions)  # local disease->precautions index
+# entext_train builds the spaCy pipeline + PhraseMatchers at import time, so importing is the load
+COMPONENTS.add("nlp", lambda: importlib.import_module("NLP_components.entext_train"))
+COMPONENTS.add("mt", MT_Inference.load)
+COMPONENTS.add("asr", ASR_Inference.load)
+WARMUP = [n.strip() for n in os.environ.get("WARMUP", "lr,precautions,nlp").split(",") if n.strip()]
+COMPONENTS.warm_up(WARMUP)
 
 
 app = Flask(__name__)
@@ -35,6 +61,39 @@ def convert_to_wav_16khz(input_path, output_path):
         output_path
     ], check=True)
 
+def decode_audio_bytes(data: bytes, ext: str = "") -> torch.Tensor:
+    """
+    Decode an uploaded audio blob to a 16 kHz mono float32 waveform ([T]) without temp files:
+    bytes go to ffmpeg's stdin and raw f32le PCM is read back from stdout.
+    Containers that need seeking (mp4/m4a with a trailing moov atom) can't be read from a pipe;
+    for those we retry with the bytes in a temp input file, still piping the output.
+    """
+    out_args = dict(format="f32le", acodec="pcm_f32le", ac=1, ar=16000)
+    try:
+        pcm, _ = (
+            ffmpeg
+            .input("pipe:0")
+            .output("pipe:1", **out_args)
+            .run(cmd=FFMPEG_BIN, input=data, capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error:
+        if ext not in (".m4a", ".mp4"):
+            raise
+        in_fd, in_path = tempfile.mkstemp(suffix=ext)
+        try:
+            with os.fdopen(in_fd, "wb") as fh:
+                fh.write(data)
+            pcm, _ = (
+                ffmpeg
+                .input(in_path)
+                .output("pipe:1", **out_args)
+                .run(cmd=FFMPEG_BIN, capture_stdout=True, capture_stderr=True)
+            )
+        finally:
+            os.remove(in_path)
+    # frombuffer is read-only over the ffmpeg bytes; copy once into a writable tensor
+    return torch.from_numpy(np.frombuffer(pcm, dtype=np.float32).copy())
+
 @app.post("/asr/transcribe")
 def asr_transcribe_endpoint():
     """
@@ -55,6 +114,7 @@ def asr_transcribe_endpoint():
 
     # Run ASR, clean up
     try:
+        COMPONENTS["asr"].get()
         text = asr_transcribe(f)  # <- your MMS transcribe() function
         return jsonify({"text": text, "device": "cuda" if torch.cuda.is_available() else ("mps" if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available() else "cpu")})
     except FileNotFoundError:
@@ -68,7 +128,7 @@ def asr_transcribe_endpoint():
 def asr_transcribe_blob():
     """
     Accepts a single uploaded audio file under form field name 'audio'.
-    Accepts webm (MediaRecorder) and converts to wav@16kHz mono before inference.
+    Accepts webm (MediaRecorder); decoded in memory to 16kHz mono PCM (no temp files) before inference.
     Returns: { text, runtime_ms, device }
     """
     t0 = time.perf_counter()
@@ -90,28 +150,18 @@ def asr_transcribe_blob():
         else:
             return jsonify({"detail": f"Unsupported file type: {ext or '(unknown)'}"}), 400
 
-    in_fd, in_path = tempfile.mkstemp(suffix=ext); os.close(in_fd)
-    out_fd, out_path = tempfile.mkstemp(suffix=".wav"); os.close(out_fd)
-
     try:
-        up.save(in_path)
-        print(f"[convert] in={in_path} -> out={out_path}")
+        data = up.read()
+        if not data:
+            return jsonify({"detail": "Empty upload."}), 400
 
-        (
-            ffmpeg
-            .input(in_path)
-            .output(out_path, ar=16000, ac=1, format="wav")
-            .overwrite_output()
-            .run(cmd=FFMPEG_BIN, quiet=True)
-        )
-
-        # Sanity-check with torchaudio (or soundfile)
-        wave, sr = torchaudio.load(out_path)
-        if sr != 16000 or wave.numel() == 0:
-            return jsonify({"detail": f"Bad WAV after convert (sr={sr}, samples={wave.numel()})."}), 500
+        # Decode straight to 16 kHz mono PCM in memory
+        wave = decode_audio_bytes(data, ext)
+        if wave.numel() == 0:
+            return jsonify({"detail": f"Bad audio after decode (samples={wave.numel()})."}), 500
 
-        # >>> Call your transcriber with PATH (Option A) <<<
-        text = asr_transcribe(out_path)
+        COMPONENTS["asr"].get()
+        text = asr_transcribe_waveform(wave)
 
         runtime_ms = int((time.perf_counter() - t0) * 1000)
         device = "cuda" if torch.cuda.is_available() else ("mps" if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available() else "cpu")
@@ -123,20 +173,90 @@ def asr_transcribe_blob():
         except Exception:
             err = str(e)
         return jsonify({"detail": "FFmpeg failed", "ffmpeg": err}), 500
-    except FileNotFoundError as e:
-        return jsonify({"detail": f"FileNotFoundError: {e}", "in_path": in_path, "out_path": out_path}), 500
     except Exception as e:
         return jsonify({"detail": f"Transcription failed: {e}", "trace": traceback.format_exc()}), 500
+
+@app.post("/asr/transcribe-stream")
+def asr_transcribe_stream_endpoint():
+    """
+    Accepts a single uploaded audio file under form field name 'audio' and decodes it
+    in overlapping windows, so long consultations never sit in memory as one tensor.
+    Streams NDJSON, one line per window: { "partial": <new text>, "text": <text so far>, "replace": <bool> },
+    then a final line { "done": true, "text": ..., "runtime_ms": ... }.
+    "text" is authoritative; "replace" is true when earlier words changed, so clients should
+    show "text" instead of appending "partial".
+    """
+    t0 = time.perf_counter()
+    if "audio" not in request.files:
+        return jsonify({"detail": "Missing file field 'audio'."}), 400
+
+    up = request.files["audio"]
+    if not up or not (up.filename or "").strip():
+        return jsonify({"detail": "Empty filename."}), 400
+
+    _, ext = os.path.splitext(up.filename.lower().strip())
+    if ext not in ALLOWED_EXTS:
+        if "webm" in (up.mimetype or "").lower():
+            ext = ".webm"
+        else:
+            return jsonify({"detail": f"Unsupported file type: {ext or '(unknown)'}"}), 400
+
+    # Windowed reads need a seekable PCM file, so normalize to wav@16kHz mono first
+    in_fd, in_path = tempfile.mkstemp(suffix=ext); os.close(in_fd)
+    out_fd, out_path = tempfile.mkstemp(suffix=".wav"); os.close(out_fd)
+    converted = False
+    try:
+        up.save(in_path)
+        (
+            ffmpeg
+            .input(in_path)
+            .output(out_path, ar=16000, ac=1, format="wav")
+            .overwrite_output()
+            .run(cmd=FFMPEG_BIN, quiet=True)
+        )
+        converted = True
+    except ffmpeg.Error as e:
+        return jsonify({"detail": "FFmpeg failed", "ffmpeg": e.stderr.decode("utf-8", errors="ignore") if e.stderr else str(e)}), 500
+    except Exception as e:
+        return jsonify({"detail": f"Transcription failed: {e}"}), 500
     finally:
-        for p in (in_path, out_path):
-            try:
-                if p and os.path.exists(p):
-                    os.remove(p)
-            except:
-                pass
+        # out_path is handed to generate(), which removes it; on any failure remove both here
+        for p in ((in_path,) if converted else (in_path, out_path)):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def generate():
+        text = ""
+        try:
+            COMPONENTS["asr"].get()
+            for delta, text in asr_transcribe_stream(out_path):
+                yield json.dumps({"partial": delta or "", "text": text.strip(), "replace": delta is None}) + "\n"
+            yield json.dumps({"done": True, "text": text.strip(),
+                              "runtime_ms": int((time.perf_counter() - t0) * 1000)}) + "\n"
+        except Exception as e:
+            yield json.dumps({"detail": f"Transcription failed: {e}"}) + "\n"
+        finally:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 @app.get("/healthz")
 def healthz():
-    return jsonify({"ok": True, **mt_info()})
+    body = {"ok": True, **mt_info()}
+    if COMPONENTS["nlp"].state == "ready":  # don't trigger the spaCy load from a health check
+        body["nlp_cache"] = COMPONENTS["nlp"].get().cache_stats()
+    return jsonify(body)
+
+@app.get("/readyz")
+def readyz():
+    """
+    Per-component load state: { ready, components: { name: { state, load_ms, error } } }.
+    Ready (200) once every WARMUP component has loaded; 503 until then.
+    """
+    status = COMPONENTS.status()
+    ready = all(status[n]["state"] == "ready" for n in WARMUP if n in status)
+    return jsonify({"ready": ready, "warmup": WARMUP, "components": status}), (200 if ready else 503)
 
 @app.post("/translate")
 def translate():
@@ -145,9 +265,16 @@ def translate():
     except Exception:
         return jsonify({"detail": "Invalid JSON"}), 400
 
-    text = (data.get("text") or "").strip()
-    if not text:
-        return jsonify({"detail": "Empty text"}), 400
+    # Either a single 'text' or a 'texts' array (batched, sentence-split and length-bucketed)
+    texts = data.get("texts")
+    if texts is not None:
+        if not isinstance(texts, list) or not texts or not all(isinstance(t, str) for t in texts):
+            return jsonify({"detail": "'texts' must be a non-empty array of strings"}), 400
+        text = None
+    else:
+        text = (data.get("text") or "").strip()
+        if not text:
+            return jsonify({"detail": "Empty text"}), 400
 
     try:
         beams   = int(data.get("beams") or 6)
@@ -156,12 +283,27 @@ def translate():
     except Exception:
         return jsonify({"detail": "Invalid parameter types"}), 400
 
+    # Optional decoding profile: "fast" (greedy), "balanced", "quality" (beam search)
+    profile = data.get("profile") or None
+    if profile is not None and profile not in MT_Inference.PROFILES:
+        return jsonify({"detail": f"Unknown profile '{profile}'. Choose from {sorted(MT_Inference.PROFILES)}"}), 400
+
     t0 = time.time()
     try:
-        out = mt_translate(text, beams=beams, max_len=max_len, len_pen=len_pen)
+        COMPONENTS["mt"].get()
+        if texts is not None:
+            outs = mt_translate_batch(texts, beams=beams, max_len=max_len, len_pen=len_pen, profile=profile)
+        else:
+            out = mt_translate(text, beams=beams, max_len=max_len, len_pen=len_pen, profile=profile)
     except Exception as e:
         return jsonify({"detail": f"Inference error: {e}"}), 500
 
+    if texts is not None:
+        return jsonify({
+            "translations": outs,
+            "runtime_ms": int((time.time() - t0) * 1000),
+            **mt_info()
+        })
     return jsonify({
         "translation": out,
         "runtime_ms": int((time.time() - t0) * 1000),
@@ -214,7 +356,9 @@ def nlp_process():
       Body: "No fever but mild headache since yesterday"
 
     Returns:
-      { "results": [ { ... } ], "runtime_ms": <int> }
+      { "results": [ { ... } ], "runtime_ms": <int>, "cache": { hits, misses, ... } }
+
+    The text is split into sentences; sentences seen before are served from the NLP cache.
     """
     if request.content_type != 'text/plain':
         return jsonify({"detail": "Only 'text/plain' is accepted."}), 415
@@ -227,9 +371,10 @@ def nlp_process():
 
     try:
         t0 = time.time()
-        results = process_texts(texts)  # remove nlp_ctx and ndjson if not needed
+        nlp_mod = COMPONENTS["nlp"].get()
+        results = nlp_mod.process_texts(texts)  # remove nlp_ctx and ndjson if not needed
         ms = int((time.time() - t0) * 1000)
-        return jsonify({"results": results, "runtime_ms": ms})
+        return jsonify({"results": results, "runtime_ms": ms, "cache": nlp_mod.cache_stats()})
     except Exception as e:
         return jsonify({"detail": f"Processing failed: {e}"}), 500
 
@@ -245,6 +390,7 @@ def predict_disease():
     if not text:
         return jsonify({"detail": "No sympyoms provided"}), 400
 
+    COMPONENTS["lr"].get()
     disease = predict(text)
     #get precaution
     precautions = get_precaution(disease)
@@ -255,6 +401,182 @@ def predict_disease():
         "precautions": precautions
     })
 
+@app.post("/predict/batch")
+def predict_disease_batch():
+    """
+    Body (JSON):
+      { "batch": [["fever", "cough"], ["chest_pain", "fatigue"]] }
+
+    Returns:
+      { "results": [ { "disease": ..., "precautions": [...] }, ... ], "runtime_ms": <int> }
+    """
+    try:
+        data = request.get_json(force=True) or {}
+    except Exception:
+        return jsonify({"detail": "Invalid JSON"}), 400
+
+    batch = data.get("batch")
+    if not batch or not isinstance(batch, list) or not all(isinstance(b, list) for b in batch):
+        return jsonify({"detail": "Provide 'batch' (array of symptom arrays)."}), 400
+    for i, symptoms in enumerate(batch):
+        for j, s in enumerate(symptoms):
+            if not isinstance(s, str):
+                return jsonify({"detail": f"batch[{i}][{j}] must be a string, got {type(s).__name__}.",
+                                "index": [i, j]}), 400
+
+    t0 = time.time()
+    COMPONENTS["lr"].get()
+    diseases = predict_batch(batch)  # one model call for the whole batch
+    results = [{"disease": d, "precautions": get_precaution(d)} for d in diseases]
+
+    return jsonify({
+        "jobId": datetime.datetime.now(),
+        "results": results,
+        "runtime_ms": int((time.time() - t0) * 1000)
+    })
+
+def _truthy(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+def triage_stages(wave=None, text=None, translate=True, profile=None):
+    """
+    Run one patient turn through every model in process, yielding (stage, result) as each
+    stage finishes: asr (audio only) -> translate (optional) -> nlp -> predict -> precautions.
+    Each result carries its own "ms". A failing stage yields ("error", {stage, detail}) and stops.
+    """
+    stage = "asr"
+    try:
+        if wave is not None:
+            t0 = time.perf_counter()
+            COMPONENTS["asr"].get()
+            text = asr_transcribe_waveform(wave)
+            yield stage, {"text": text, "ms": int((time.perf_counter() - t0) * 1000)}
+
+        stage = "translate"
+        english = (text or "").strip()
+        if translate and english:
+            t0 = time.perf_counter()
+            COMPONENTS["mt"].get()
+            english = mt_translate(english, profile=profile)
+            yield stage, {"translation": english, "ms": int((time.perf_counter() - t0) * 1000)}
+
+        stage = "nlp"
+        t0 = time.perf_counter()
+        nlp_mod = COMPONENTS["nlp"].get()
+        names = nlp_mod.process_texts([english]) if english else []
+        # same column form the frontend sends to /predict: "Sore Throat" -> "sore_throat"
+        symptoms = list(dict.fromkeys("_".join(n.lower().split()) for n in names))
+        yield stage, {"symptoms": symptoms, "ms": int((time.perf_counter() - t0) * 1000)}
+
+        stage = "predict"
+        t0 = time.perf_counter()
+        disease = None
+        if symptoms:
+            COMPONENTS["lr"].get()
+            disease = predict_batch([symptoms])[0]
+        yield stage, {"disease": disease, "ms": int((time.perf_counter() - t0) * 1000)}
+
+        stage = "precautions"
+        t0 = time.perf_counter()
+        precautions = []
+        if disease is not None:
+            COMPONENTS["precautions"].get()
+            precautions = get_precaution(disease)
+        yield stage, {"precautions": precautions, "ms": int((time.perf_counter() - t0) * 1000)}
+    except Exception as e:
+        yield "error", {"stage": stage, "detail": f"{stage} failed: {e}"}
+
+@app.post("/triage")
+def triage():
+    """
+    One round trip per patient turn: audio -> ASR -> MT -> NLP -> LR prediction -> precautions.
+
+    Input, either:
+      multipart/form-data with field 'audio' (same formats as /asr/transcribe-blob), or
+      JSON { "text": "..." } to start from text.
+    Options (form fields, JSON keys or query args):
+      translate : translate the text to English first (default true)
+      profile   : MT decoding profile ("fast", "balanced", "quality"; default: /translate's beam search)
+      stream    : if true, respond with server-sent events, one event per stage as it finishes,
+                  then a final "done" event carrying the full result
+
+    Returns:
+      { "jobId", "text", "translation", "symptoms", "disease", "precautions",
+        "timings_ms": { asr, translate, nlp, predict, precautions, total } }
+    """
+    t0 = time.perf_counter()
+    wave, text = None, None
+    if "audio" in request.files:
+        opts = {**request.args.to_dict(), **request.form.to_dict()}
+        up = request.files["audio"]
+        if not up or not (up.filename or "").strip():
+            return jsonify({"detail": "Empty filename."}), 400
+        _, ext = os.path.splitext(up.filename.lower().strip())
+        if ext not in ALLOWED_EXTS:
+            if "webm" in (up.mimetype or "").lower():
+                ext = ".webm"
+            else:
+                return jsonify({"detail": f"Unsupported file type: {ext or '(unknown)'}"}), 400
+        data = up.read()
+        if not data:
+            return jsonify({"detail": "Empty upload."}), 400
+        try:
+            wave = decode_audio_bytes(data, ext)
+        except ffmpeg.Error as e:
+            return jsonify({"detail": "FFmpeg failed", "ffmpeg": e.stderr.decode("utf-8", errors="ignore") if e.stderr else str(e)}), 500
+        if wave.numel() == 0:
+            return jsonify({"detail": "Bad audio after decode (samples=0)."}), 500
+    else:
+        try:
+            body = request.get_json(force=True) or {}
+        except Exception:
+            return jsonify({"detail": "Invalid JSON"}), 400
+        opts = {**request.args.to_dict(), **body}
+        text = (body.get("text") or "").strip()
+        if not text:
+            return jsonify({"detail": "Provide 'audio' (multipart) or 'text' (JSON)."}), 400
+
+    translate = _truthy(opts.get("translate"), True)
+    profile = opts.get("profile") or None
+    if profile is not None and profile not in MT_Inference.PROFILES:
+        return jsonify({"detail": f"Unknown profile '{profile}'. Choose from {sorted(MT_Inference.PROFILES)}"}), 400
+    decode_ms = int((time.perf_counter() - t0) * 1000)
+
+    result = {"jobId": datetime.datetime.now().isoformat(), "text": text, "translation": None,
+              "symptoms": [], "disease": None, "precautions": [], "timings_ms": {}}
+    if wave is not None:
+        result["timings_ms"]["decode"] = decode_ms
+    stages = triage_stages(wave=wave, text=text, translate=translate, profile=profile)
+
+    def collect(stage, out):
+        result["timings_ms"][stage] = out.pop("ms")
+        result.update(out)
+
+    if _truthy(opts.get("stream"), False):
+        def generate():
+            for stage, out in stages:
+                if stage == "error":
+                    yield f"event: error\ndata: {json.dumps(out)}\n\n"
+                    return
+                yield f"event: {stage}\ndata: {json.dumps(out, default=str)}\n\n"
+                collect(stage, out)
+            result["timings_ms"]["total"] = int((time.perf_counter() - t0) * 1000)
+            yield f"event: done\ndata: {json.dumps(result, default=str)}\n\n"
+
+        return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    for stage, out in stages:
+        if stage == "error":
+            return jsonify({**out, "partial": result}), 500
+        collect(stage, out)
+    result["timings_ms"]["total"] = int((time.perf_counter() - t0) * 1000)
+    return jsonify(result)
+
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000, debug=True)
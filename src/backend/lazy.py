@@ -0,0 +1,69 @@
+# src/backend/lazy.py
+# PURPOSE: Load heavy backend components (models, NLP pipeline) on first use or in background threads.
+
+import threading
+import time
+import traceback
+
+
+class LazyComponent:
+    """
+    Wraps a zero-arg loader. The first get() runs it (other callers wait on the same load);
+    warm_up() runs it in a daemon thread so startup doesn't block. State is reported by status().
+    """
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._lock = threading.Lock()
+        self.state = "idle"  # idle | loading | ready | error
+        self.load_ms = None
+        self.error = None
+
+    def get(self):
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state != "ready":
+                self.state = "loading"
+                t0 = time.perf_counter()
+                try:
+                    self._value = self._loader()
+                except Exception as e:
+                    self.state, self.error = "error", f"{e}"
+                    traceback.print_exc()
+                    raise
+                self.load_ms = int((time.perf_counter() - t0) * 1000)
+                self.state, self.error = "ready", None
+                print(f"[lazy] {self.name} ready in {self.load_ms} ms")
+        return self._value
+
+    def warm_up(self) -> threading.Thread:
+        def run():
+            try:
+                self.get()
+            except Exception:
+                pass  # already recorded in self.error
+        t = threading.Thread(target=run, name=f"warmup-{self.name}", daemon=True)
+        t.start()
+        return t
+
+    def status(self) -> dict:
+        return {"state": self.state, "load_ms": self.load_ms, "error": self.error}
+
+
+class ComponentRegistry(dict):
+    """name -> LazyComponent, with helpers for warm-up and readiness reporting."""
+
+    def add(self, name: str, loader) -> LazyComponent:
+        self[name] = LazyComponent(name, loader)
+        return self[name]
+
+    def warm_up(self, names):
+        for n in names:
+            if n in self:
+                self[n].warm_up()
+
+    def status(self) -> dict:
+        return {n: c.status() for n, c in self.items()}
@@ -85,6 +85,26 @@ export async function translate(text, beams = 6, maxLen = 160, lenPen = 1.0) {
   if (!res.ok) throw new Error((await res.json()).detail || `HTTP ${res.status}`);
   return res.json();
 }
+// Whole patient turn in one round trip: audio (Blob/File) or text -> ASR -> MT -> NLP -> disease -> precautions
+export async function triageTurn({ audio, text, translate = true, profile } = {}) {
+  let init
+  if (audio) {
+    const fd = new FormData();
+    fd.append("audio", audio, audio.name || "speech.webm");
+    fd.append("translate", String(translate));
+    if (profile) fd.append("profile", profile);
+    init = { method: "POST", body: fd };
+  } else {
+    init = {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ text, translate, profile }),
+    };
+  }
+  const res = await fetch(`${BASE}/triage`, init);
+  if (!res.ok) throw new Error((await res.json().catch(() => ({}))).detail || `HTTP ${res.status}`);
+  return res.json(); // { text, translation, symptoms, disease, precautions, timings_ms }
+}
 /** ---------- Auth ---------- */
 export async function login(email, password) {
   // 真实接口：return await req('/auth/login', { method:'POST', json:{email,password} })